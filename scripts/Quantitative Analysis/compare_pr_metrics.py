@@ -1,7 +1,11 @@
 import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # file output only; also safe in worker processes
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 
@@ -11,6 +15,25 @@ try:
 except Exception:
     _HAS_SCIPY = False
 
+try:
+    from numba import njit
+    _HAS_NUMBA = True
+except Exception:
+    _HAS_NUMBA = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
+try:
+    import polars as pl
+    _HAS_POLARS = _HAS_PYARROW  # polars' to_pandas needs pyarrow
+except Exception:
+    _HAS_POLARS = False
+
 # one chart per figure, no specific colors/styles
 NUMERIC_METRICS = [
     "time_to_close_hours",
@@ -29,39 +52,53 @@ NUMERIC_METRICS = [
 BOOL_COLS = ["is_closed", "is_merged"]
 
 def _quantiles(x):
-    x = pd.Series(x).dropna()
-    if x.empty:
+    arr = np.asarray(pd.Series(x).dropna(), dtype=np.float64)
+    if arr.size == 0:
         return {"min": np.nan, "q1": np.nan, "median": np.nan, "mean": np.nan, "q3": np.nan, "max": np.nan}
+    # one partition pass for all five order statistics (linear interpolation, as Series.quantile)
+    q = np.quantile(arr, [0.0, 0.25, 0.5, 0.75, 1.0])
     return {
-        "min": float(x.min()),
-        "q1": float(x.quantile(0.25)),
-        "median": float(x.median()),
-        "mean": float(x.mean()),
-        "q3": float(x.quantile(0.75)),
-        "max": float(x.max()),
+        "min": float(q[0]),
+        "q1": float(q[1]),
+        "median": float(q[2]),
+        "mean": float(arr.mean()),
+        "q3": float(q[3]),
+        "max": float(q[4]),
     }
 
+if _HAS_NUMBA:
+    @njit(cache=True)
+    def _cliff_counts(a_sorted, b_sorted):
+        # linear merge-style scans over both sorted arrays; no temporaries
+        na, nb = a_sorted.size, b_sorted.size
+        less = more = 0
+        j = 0
+        for i in range(na):
+            while j < nb and b_sorted[j] < a_sorted[i]:
+                j += 1
+            less += j
+        i = 0
+        for j in range(nb):
+            while i < na and a_sorted[i] < b_sorted[j]:
+                i += 1
+            more += i
+        return less, more
+
 def cliffs_delta(a, b):
     a = pd.Series(a).dropna().values
     b = pd.Series(b).dropna().values
     if len(a) == 0 or len(b) == 0:
         return np.nan
-    # Efficient Cliff's delta: count pairwise comparisons using sorting
-    a_sorted = np.sort(a)
-    b_sorted = np.sort(b)
-    i = j = more = less = 0
+    # Efficient Cliff's delta: count pairwise comparisons over sorted arrays
+    a_sorted = np.ascontiguousarray(np.sort(np.asarray(a, dtype=np.float64)))
+    b_sorted = np.ascontiguousarray(np.sort(np.asarray(b, dtype=np.float64)))
     na, nb = len(a_sorted), len(b_sorted)
-    while i < na:
-        while j < nb and b_sorted[j] < a_sorted[i]:
-            j += 1
-        less += j
-        i += 1
-    i = j = 0
-    while j < nb:
-        while i < na and a_sorted[i] < b_sorted[j]:
-            i += 1
-        more += i
-        j += 1
+    # less: pairs with b < a; more: pairs with a < b
+    if _HAS_NUMBA:
+        less, more = _cliff_counts(a_sorted, b_sorted)
+    else:
+        less = int(np.searchsorted(b_sorted, a_sorted, side="left").sum())
+        more = int(np.searchsorted(a_sorted, b_sorted, side="left").sum())
     # pairs = na*nb; delta = (more - less)/pairs
     pairs = na * nb
     if pairs == 0:
@@ -81,15 +118,20 @@ def label_effect_size(delta_abs):
     return "Large"
 
 def coerce_numeric(df, cols):
-    for c in cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
+    present = [c for c in cols if c in df.columns]
+    if present:
+        df[present] = df[present].apply(pd.to_numeric, errors="coerce")
     return df
 
 def coerce_bool(df, cols):
     for c in cols:
         if c in df.columns:
-            df[c] = df[c].astype(str).str.strip().str.lower().map({"true": True, "false": False})
+            # normalize only the few distinct raw values, then map the whole column through that lookup
+            uniq = pd.Series(df[c].dropna().unique())
+            norm = uniq.astype(str).str.strip().str.lower().map({"true": True, "false": False})
+            mapped = df[c].map(dict(zip(uniq, norm)))
+            # bool when every value mapped, object (True/False/NaN) otherwise
+            df[c] = mapped if mapped.dtype == bool else mapped.astype(object)
     return df
 
 def summarize_dataset(df: pd.DataFrame, name: str) -> pd.Series:
@@ -99,51 +141,67 @@ def summarize_dataset(df: pd.DataFrame, name: str) -> pd.Series:
     acc = (closed.fillna(False) | merged.fillna(False)).mean() if len(df) else np.nan
     s["acceptance_rate"] = acc
 
+    present = [m for m in NUMERIC_METRICS if m in df.columns]
+    stats = df[present].agg(["mean", "median"]) if present else None
     for m in NUMERIC_METRICS:
-        s[f"avg_{m}"] = df[m].mean() if m in df.columns else np.nan
+        s[f"avg_{m}"] = stats.at["mean", m] if m in present else np.nan
     for m in NUMERIC_METRICS:
-        s[f"median_{m}"] = df[m].median() if m in df.columns else np.nan
+        s[f"median_{m}"] = stats.at["median", m] if m in present else np.nan
 
     s["num_prs"] = len(df)
     s.name = name
     return s
 
-def make_boxplots(df_all: pd.DataFrame, out_dir: Path, dataset_col: str = "dataset"):
+def _render_one(m: str, data: list, labels: list, out_dir: Path):
+    # one figure per metric; runs in a worker process, so arguments are plain arrays/strings
+    plt.figure()
+    bp = plt.boxplot(
+        data,
+        labels=labels,
+        showfliers=False,          # HIDE outliers to avoid extreme scaling
+        showmeans=True,            # still show the mean explicitly
+        meanline=False,            # mean as a marker (not a line)
+        meanprops={"marker": "x", "markersize": 8, "markeredgewidth": 1.5, "markerfacecolor": "tab:orange", "markeredgecolor": "tab:orange"},
+        medianprops={"color": "green", "linewidth": 1.5},  # distinguish median from mean
+    )
+    # Legend with proxy artists so the meaning is clear
+    handles = [
+        Line2D([], [], color="green", linestyle="-", label="Median"),
+        Line2D([], [], marker="x", color="tab:orange", linestyle="None", label="Mean"),
+    ]
+    plt.legend(handles=handles, loc="best", frameon=False)
+
+    plt.ylabel(m)
+    plt.title(f"Distribution of {m} by dataset")
+    fig_path = out_dir / f"box_{m}.png"
+    plt.tight_layout()
+    plt.savefig(fig_path)
+    plt.close()
+
+def make_boxplots(df_all: pd.DataFrame, out_dir: Path, dataset_col: str = "dataset", workers: int = None):
     out_dir.mkdir(parents=True, exist_ok=True)
-    # generate one plot per metric
+    # group once; every metric reuses the same per-dataset frames
+    groups = list(df_all.groupby(dataset_col, observed=True))
+    labels = [g[0] for g in groups]
+    # collect one plot task per metric
+    tasks = []
     for m in NUMERIC_METRICS:
         if m not in df_all.columns:
             continue
         if df_all[m].dropna().empty:
             continue
-        groups = list(df_all.groupby(dataset_col))
         data = [g[1][m].dropna().values for g in groups]
-        labels = [g[0] for g in groups]
         if sum(len(arr) for arr in data) == 0:
             continue
-        plt.figure()
-        bp = plt.boxplot(
-            data,
-            labels=labels,
-            showfliers=False,          # HIDE outliers to avoid extreme scaling
-            showmeans=True,            # still show the mean explicitly
-            meanline=False,            # mean as a marker (not a line)
-            meanprops={"marker": "x", "markersize": 8, "markeredgewidth": 1.5, "markerfacecolor": "tab:orange", "markeredgecolor": "tab:orange"},
-            medianprops={"color": "green", "linewidth": 1.5},  # distinguish median from mean
-        )
-        # Legend with proxy artists so the meaning is clear
-        handles = [
-            Line2D([], [], color="green", linestyle="-", label="Median"),
-            Line2D([], [], marker="x", color="tab:orange", linestyle="None", label="Mean"),
-        ]
-        plt.legend(handles=handles, loc="best", frameon=False)
-
-        plt.ylabel(m)
-        plt.title(f"Distribution of {m} by dataset")
-        fig_path = out_dir / f"box_{m}.png"
-        plt.tight_layout()
-        plt.savefig(fig_path)
-        plt.close()
+        tasks.append((m, data, labels, out_dir))
+    # plots are independent; render them in parallel worker processes
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        for t in tasks:
+            _render_one(*t)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(_render_one, *zip(*tasks)))
 
 def load_and_prepare(path: Path, dataset_name: str) -> pd.DataFrame:
     df = pd.read_csv(path)
@@ -152,27 +210,89 @@ def load_and_prepare(path: Path, dataset_name: str) -> pd.DataFrame:
     df = coerce_numeric(df, NUMERIC_METRICS)
     return df
 
+def _metric_arrays(df: pd.DataFrame) -> dict:
+    # NaN-free NumPy array per metric, computed once per dataset
+    return {m: df[m].dropna().to_numpy() for m in NUMERIC_METRICS if m in df.columns}
+
+def load_and_summarize_polars(sources):
+    """
+    Polars engine: lazily scan every (path, label) CSV, coerce types, concatenate, and compute the
+    per-file summary with one parallel group_by. Returns (df_all as pandas, summary_df) with the
+    same columns as load_and_prepare() + summarize_dataset().
+    """
+    frames = []
+    for i, (path, label) in enumerate(sources):
+        lf = pl.scan_csv(path, infer_schema_length=10000)
+        cols = lf.collect_schema().names()
+        exprs = [pl.col(m).cast(pl.Float64, strict=False) for m in NUMERIC_METRICS if m in cols]
+        for c in BOOL_COLS:
+            if c in cols:
+                norm = pl.col(c).cast(pl.String).str.strip_chars().str.to_lowercase()
+                exprs.append(pl.when(norm == "true").then(True).when(norm == "false").then(False)
+                             .otherwise(None).alias(c))
+        exprs += [pl.lit(label).alias("dataset"), pl.lit(i).alias("__source__")]
+        frames.append(lf.with_columns(exprs))
+    lf_all = pl.concat(frames, how="diagonal_relaxed")
+
+    cols = lf_all.collect_schema().names()
+    present = [m for m in NUMERIC_METRICS if m in cols]
+    flag = lambda c: pl.col(c).fill_null(False) if c in cols else pl.lit(False)
+    aggs = [(flag("is_closed") | flag("is_merged")).cast(pl.Float64).mean().alias("acceptance_rate")]
+    aggs += [pl.col(m).mean().alias(f"avg_{m}") for m in present]
+    aggs += [pl.col(m).median().alias(f"median_{m}") for m in present]
+    aggs += [pl.len().alias("num_prs")]
+
+    df_all = lf_all.collect()
+    stats = df_all.group_by("__source__").agg(aggs).sort("__source__").to_pandas()
+    summary_df = pd.DataFrame(
+        stats.drop(columns="__source__").to_dict("records"),
+        index=[label for _, label in sources],
+    )
+    order = ["acceptance_rate"] + [f"avg_{m}" for m in NUMERIC_METRICS] + [f"median_{m}" for m in NUMERIC_METRICS] + ["num_prs"]
+    summary_df = summary_df.reindex(columns=order)
+    return df_all.drop("__source__").to_pandas(), summary_df
+
+def write_long(df: pd.DataFrame, path: Path, fmt: str = "csv"):
+    # Parquet (snappy) or CSV via pyarrow's multithreaded writer; pandas to_csv as fallback
+    if fmt == "parquet":
+        df.to_parquet(path, index=False, compression="snappy")
+        return
+    if _HAS_PYARROW:
+        try:
+            pcsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), str(path))
+            return
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass  # mixed-type object column; let pandas stringify it
+    df.to_csv(path, index=False)
+
+def _mann_whitney_p(a: np.ndarray, b: np.ndarray) -> float:
+    # p-value via Mann-Whitney U (two-sided) if SciPy available; degenerate inputs skip the ranking
+    if not _HAS_SCIPY or a.size < 2 or b.size < 2:
+        return np.nan
+    a_min, b_min = a.min(), b.min()
+    if a_min == a.max() and b_min == b.max() and a_min == b_min:
+        return 1.0  # every value tied
+    try:
+        stat, p = mannwhitneyu(a, b, alternative="two-sided")
+    except Exception:
+        p = np.nan
+    return p
+
 def build_comparison_table(df_all: pd.DataFrame, label_a: str, label_b: str, dataset_col: str = "dataset") -> pd.DataFrame:
     rows = []
     # group data by dataset label
-    g = {k: v for k, v in df_all.groupby(dataset_col)}
-    A = g.get(label_a, pd.DataFrame())
-    B = g.get(label_b, pd.DataFrame())
+    g = {k: v for k, v in df_all.groupby(dataset_col, observed=True)}
+    A = _metric_arrays(g.get(label_a, pd.DataFrame()))
+    B = _metric_arrays(g.get(label_b, pd.DataFrame()))
+    empty = np.array([], dtype=float)
     for m in NUMERIC_METRICS:
         if m not in df_all.columns:
             continue
-        a = A[m] if m in A.columns else pd.Series(dtype=float)
-        b = B[m] if m in B.columns else pd.Series(dtype=float)
+        a = A.get(m, empty)
+        b = B.get(m, empty)
         qa = _quantiles(a)
         qb = _quantiles(b)
-        # p-value via Mann-Whitney U (two-sided) if SciPy available and both non-empty
-        if _HAS_SCIPY and a.dropna().size > 0 and b.dropna().size > 0:
-            try:
-                stat, p = mannwhitneyu(a.dropna(), b.dropna(), alternative="two-sided")
-            except Exception:
-                p = np.nan
-        else:
-            p = np.nan
+        p = _mann_whitney_p(a, b)
         # Cliff's delta (directional)
         delta = cliffs_delta(a, b)
         eff_label = label_effect_size(abs(delta))
@@ -204,8 +324,15 @@ def main():
     ap.add_argument("--label-b", default=None, help="Label for dataset B (defaults to filename)")
     ap.add_argument("--out-summary", default="metrics_summary_by_file.csv", help="Output CSV for per-file summary")
     ap.add_argument("--out-long", default="metrics_long_concat.csv", help="Output CSV for concatenated long form")
+    ap.add_argument("--out-long-format", choices=["csv", "parquet"], default="csv",
+                    help="Format for --out-long (parquet requires pyarrow; a .csv suffix is swapped for .parquet)")
     ap.add_argument("--out-plots", default="plots", help="Output directory for box plots")
     ap.add_argument("--out-table", default="metrics_comparison_table.csv", help="Output CSV for side-by-side comparison table")
+    ap.add_argument("--engine", choices=["pandas", "polars"], default="pandas",
+                    help="Loading/summary engine; polars is faster on large files, but its output dtypes can differ "
+                         "(e.g. integer counts)")
+    ap.add_argument("--plot-workers", type=int, default=None,
+                    help="Processes used to render box plots (default: CPU count; 1 renders in-process)")
     args = ap.parse_args()
 
     pA = Path(args.file_a)
@@ -213,23 +340,35 @@ def main():
     label_a = args.label_a or pA.name
     label_b = args.label_b or pB.name
 
-    df_a = load_and_prepare(pA, label_a)
-    df_b = load_and_prepare(pB, label_b)
+    engine = args.engine
+    if engine == "polars" and not _HAS_POLARS:
+        raise SystemExit("--engine polars requires the polars and pyarrow packages")
+
+    if engine == "polars":
+        df_all, summary_df = load_and_summarize_polars([(pA, label_a), (pB, label_b)])
+    else:
+        df_a = load_and_prepare(pA, label_a)
+        df_b = load_and_prepare(pB, label_b)
+
+        df_all = pd.concat([df_a, df_b], ignore_index=True)
 
-    df_all = pd.concat([df_a, df_b], ignore_index=True)
+        sum_a = summarize_dataset(df_a, label_a)
+        sum_b = summarize_dataset(df_b, label_b)
+        summary_df = pd.DataFrame([sum_a, sum_b])
 
-    sum_a = summarize_dataset(df_a, label_a)
-    sum_b = summarize_dataset(df_b, label_b)
-    summary_df = pd.DataFrame([sum_a, sum_b])
+    # two distinct labels repeated on every row: store as integer codes (groupby hashes codes, not strings)
+    df_all["dataset"] = df_all["dataset"].astype("category")
 
     out_summary = Path(args.out_summary)
     out_long = Path(args.out_long)
+    if args.out_long_format == "parquet" and out_long.suffix == ".csv":
+        out_long = out_long.with_suffix(".parquet")
     out_plots = Path(args.out_plots)
 
     summary_df.to_csv(out_summary, index=True)
-    df_all.to_csv(out_long, index=False)
+    write_long(df_all, out_long, args.out_long_format)
 
-    make_boxplots(df_all, out_plots)
+    make_boxplots(df_all, out_plots, workers=args.plot_workers)
 
     comp_df = build_comparison_table(df_all, label_a, label_b)
     comp_out = Path(args.out_table)
@@ -19,14 +19,34 @@ Metrics per PR:
 - commits (count)          [from PR detail, field: "commits"]
 - changed_files (count)    [from PR detail, field: "changed_files"]
 - additions, deletions, code_churn (additions+deletions)  [from PR detail]
-- review_iterations        [# of reviews from /pulls/{number}/reviews]
+- review_iterations        [# of reviews on the PR]
 - total_comments           [issue comments + review comments]
 - reviewer_workload_hours  [avg time from review_requested -> review submitted, per review]
 
 Reviewer workload notes:
 - We approximate by pairing review_requested events with subsequent reviews from the same reviewer.
 - If no matching review_requested event is found, we fall back to (review.submitted_at - PR.created_at).
-- This is an approximation due to REST API constraints. For exact timelines, consider GraphQL timeline queries.
+- Review requests come from REVIEW_REQUESTED_EVENT timeline items (GraphQL) or review_requested issue events (REST).
+
+API modes (--api):
+- graphql: one POST to /graphql returns detail, reviews, comment counts and review requests for up to
+  GRAPHQL_BATCH PRs (aliased as pr0, pr1, ...). Requires GITHUB_TOKEN.
+- rest:    five REST endpoints per PR (detail, reviews, issue comments, review comments, issue events).
+- auto:    graphql when GITHUB_TOKEN is set, rest otherwise (default).
+
+Pagination:
+- REST list endpoints (reviews, issue comments, review comments, issue events) are read with per_page=100.
+  When the first page's Link header advertises rel="last", the remaining pages are fetched concurrently;
+  otherwise rel="next" links are followed one page at a time.
+
+Caching:
+- REST GET responses are stored with their ETag (and Link header) in --cache (SQLite). Re-runs send If-None-Match and GitHub
+  answers 304 Not Modified for unchanged resources, which does not count against the rate limit.
+  Disable with --no-cache. GraphQL responses are not cached (GitHub does not return ETags for them).
+
+Concurrency:
+- Requests run concurrently (REST: all five endpoints of a PR at once; GraphQL: several batches at once),
+  with up to --concurrency PRs/batches in flight over one shared aiohttp connection pool.
 
 CLI:
     python get_pr_metrics.py --ids 2625652637,2474497456,...
@@ -37,16 +57,19 @@ import os
 import sys
 import time
 import json
-import math
+import re
+import asyncio
+import sqlite3
 import argparse
-from datetime import datetime, timezone
-from urllib.parse import urlparse
-import requests
+from urllib.parse import urlencode, urlsplit, parse_qs
+import aiohttp
+import numpy as np
 import pandas as pd
 
 CSV_PATH = "/Users/xingqian/Desktop/MSR_Challenge/pull_request.csv"
 OUT_FULL = "curated_pr_metrics_agent_created.csv"
 OUT_SUMMARY = "curated_pr_metrics_agent_created_summary.csv"
+CACHE_PATH = "gh_cache.sqlite"
 
 # ---- Fill these 40 IDs by default (can be overridden via --ids) ----
 DEFAULT_IDS = [
@@ -85,7 +108,30 @@ DEFAULT_IDS = [
 3151982889
 ]
 
-ISO_FMT = "%Y-%m-%dT%H:%M:%SZ"
+NAT_NS = np.iinfo(np.int64).min  # pd.NaT as int64 nanoseconds
+NS_PER_HOUR = 3600 * 10**9
+MAX_CONNECTIONS = 32
+REST_CALLS_PER_PR = 5
+KEEPALIVE_SECONDS = 60
+REQUEST_TIMEOUT = 30  # seconds to connect, and without data on the socket
+PER_PAGE = 100  # GitHub's maximum page size for REST list endpoints (default is 30)
+LINK_RE = re.compile(r'<([^>]+)>\s*;\s*rel="([^"]+)"')
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+GRAPHQL_BATCH = 20
+PR_GRAPHQL_FIELDS = """
+additions deletions changedFiles
+commits { totalCount }
+comments { totalCount }
+reviews(first: 100) {
+  pageInfo { hasNextPage }
+  nodes { databaseId author { login } state submittedAt comments { totalCount } }
+}
+timelineItems(first: 100, itemTypes: [REVIEW_REQUESTED_EVENT]) {
+  pageInfo { hasNextPage }
+  nodes { ... on ReviewRequestedEvent { createdAt requestedReviewer { ... on User { login } } } }
+}
+"""
 
 def parse_args():
     ap = argparse.ArgumentParser()
@@ -94,21 +140,60 @@ def parse_args():
     ap.add_argument("--csv", type=str, default=CSV_PATH, help="Path to human_pull_request.csv")
     ap.add_argument("--out_full", type=str, default=OUT_FULL, help="Output CSV path for full metrics")
     ap.add_argument("--out_summary", type=str, default=OUT_SUMMARY, help="Output CSV path for summary metrics")
+    ap.add_argument("--concurrency", type=int, default=10, help="Max number of PRs (REST) or batches (GraphQL) fetched concurrently")
+    ap.add_argument("--api", choices=["auto", "graphql", "rest"], default="auto",
+                    help="GitHub API to query; auto uses GraphQL when GITHUB_TOKEN is set")
+    ap.add_argument("--cache", type=str, default=CACHE_PATH, help="SQLite file for ETag-cached REST responses")
+    ap.add_argument("--no-cache", action="store_true", help="Do not read or write the REST response cache")
     return ap.parse_args()
 
-def parse_owner_repo_from_repo_url(repo_url: str):
-    # repo_url example: https://api.github.com/repos/getsentry/sentry
-    try:
-        parts = urlparse(repo_url)
-        path = parts.path.strip("/")
-        # path like 'repos/{owner}/{repo}'
-        segs = path.split("/")
-        idx = segs.index("repos")
-        owner = segs[idx+1]
-        repo = segs[idx+2]
-        return owner, repo
-    except Exception:
-        return None, None
+def resolve_owner_repos(subset):
+    """
+    Column-wise owner/repo parsing for all PRs at once.
+    repo_url example: https://api.github.com/repos/getsentry/sentry
+    fallback html_url: https://github.com/{owner}/{repo}/pull/{number}
+    Returns two lists (owners, repos) aligned with subset; unparseable entries are None.
+    """
+    api = subset["repo_url"].astype("string").str.extract(r"/repos/([^/?#]+)/([^/?#]+)")
+    html = subset["html_url"].astype("string").str.extract(r"^[^:/]+://[^/]+/([^/?#]+)/([^/?#]+)")
+    use_html = api[0].isna() | api[1].isna()
+    owners = api[0].where(~use_html, html[0])
+    repos = api[1].where(~use_html, html[1])
+    as_list = lambda s: [v if isinstance(v, str) else None for v in s]
+    return as_list(owners), as_list(repos)
+
+class ResponseCache:
+    """
+    SQLite store of REST responses keyed by URL (+ query params), kept with their ETag so
+    repeat requests can be made conditional (If-None-Match -> 304 Not Modified).
+    The Link header is stored too, so a cached first page still knows how many pages follow.
+    """
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, etag TEXT, body TEXT, link TEXT)")
+        # Caches written before the link column existed
+        cols = {r[1] for r in self.conn.execute("PRAGMA table_info(responses)")}
+        if "link" not in cols:
+            self.conn.execute("ALTER TABLE responses ADD COLUMN link TEXT")
+
+    @staticmethod
+    def key(url, params=None):
+        return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+    def get(self, key):
+        row = self.conn.execute("SELECT etag, body, link FROM responses WHERE key = ?", (key,)).fetchone()
+        return row if row else (None, None, None)
+
+    def put(self, key, etag, body, link=None):
+        self.conn.execute("INSERT OR REPLACE INTO responses (key, etag, body, link) VALUES (?, ?, ?, ?)",
+                          (key, etag, body, link))
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+# Set by fetch_all() for the duration of a run; None disables caching
+RESPONSE_CACHE = None
 
 def gh_headers():
     raw = os.environ.get("GITHUB_TOKEN", "")
@@ -119,58 +204,119 @@ def gh_headers():
         hdrs["Authorization"] = f"Bearer {token}"
     return hdrs
 
-def gh_get(url, params=None, max_retries=3):
+def parse_link_header(value):
+    """Parse a GitHub Link header into {rel: url}, e.g. {"next": ..., "last": ...}."""
+    return {rel: url for url, rel in LINK_RE.findall(value or "")}
+
+def page_number(url):
+    """page= query value of a pagination URL, or None."""
+    if not url:
+        return None
+    page = parse_qs(urlsplit(url).query).get("page")
+    return int(page[0]) if page and page[0].isdigit() else None
+
+async def _gh_request(session, method, url, params=None, payload=None, max_retries=3):
+    """Returns (json, Link header); json is None on failure."""
+    cache = RESPONSE_CACHE if method == "GET" else None
+    cache_key = etag = cached_body = cached_link = None
+    if cache is not None:
+        cache_key = ResponseCache.key(url, params)
+        etag, cached_body, cached_link = cache.get(cache_key)
+    headers = {"If-None-Match": etag} if etag else None
     for attempt in range(max_retries):
-        r = requests.get(url, headers=gh_headers(), params=params, timeout=30)
+        # Read the whole response, then leave the block before any sleep so the pooled connection is released
+        try:
+            async with session.request(method, url, params=params, json=payload, headers=headers) as r:
+                status, resp_headers, text = r.status, r.headers, await r.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Connection errors and timeouts are retried like a 5xx
+            if attempt + 1 == max_retries:
+                print(f"[WARN] {method} {url} failed: {type(e).__name__} {e}", flush=True)
+                return None, None
+            await asyncio.sleep(2 ** attempt)
+            continue
+        if status == 304 and cached_body is not None:
+            return json.loads(cached_body), cached_link
         # Fast-fail on invalid token to avoid noisy retries
-        if r.status_code == 401:
+        if status == 401:
             print(f"[ERROR] 401 Bad credentials for {url}. Check GITHUB_TOKEN (missing/expired/wrong scopes/SSO not authorized).", flush=True)
-            return None
-        if r.status_code == 403:
+            return None, None
+        if status == 403:
             # Handle rate limiting
-            reset = r.headers.get("X-RateLimit-Reset")
+            reset = resp_headers.get("X-RateLimit-Reset")
             if reset:
                 try:
                     wait = max(0, int(reset) - int(time.time()) + 2)
                     print(f"[RateLimit] Sleeping {wait}s until reset...", flush=True)
-                    time.sleep(wait)
+                    await asyncio.sleep(wait)
                     continue
                 except Exception:
                     pass
             # Backoff fallback
-            time.sleep(2 ** attempt)
-        if r.status_code in (200, 201):
-            return r.json()
+            await asyncio.sleep(2 ** attempt)
+        if status in (200, 201):
+            link = resp_headers.get("Link")
+            if cache is not None and resp_headers.get("ETag"):
+                cache.put(cache_key, resp_headers["ETag"], text, link)
+            return (json.loads(text) if text.strip() else None), link
         # Retry on 5xx
-        if 500 <= r.status_code < 600:
-            time.sleep(2 ** attempt)
+        if 500 <= status < 600:
+            await asyncio.sleep(2 ** attempt)
             continue
         # Other errors: return None with warning
-        print(f"[WARN] GET {url} failed: {r.status_code} {r.text[:200]}", flush=True)
-        return None
-    return None
+        print(f"[WARN] {method} {url} failed: {status} {text[:200]}", flush=True)
+        return None, None
+    return None, None
 
-def to_dt(s):
-    if not s or (isinstance(s, float) and math.isnan(s)):
-        return None
-    try:
-        # GitHub returns Zulu times like 2024-01-02T03:04:05Z
-        return datetime.strptime(str(s), ISO_FMT).replace(tzinfo=timezone.utc)
-    except Exception:
-        try:
-            # Try pandas parser style
-            return pd.to_datetime(s, utc=True, errors="coerce").to_pydatetime()
-        except Exception:
-            return None
+async def gh_request(session, method, url, params=None, payload=None, max_retries=3):
+    data, _ = await _gh_request(session, method, url, params=params, payload=payload, max_retries=max_retries)
+    return data
+
+async def gh_get(session, url, params=None, max_retries=3):
+    return await gh_request(session, "GET", url, params=params, max_retries=max_retries)
+
+async def gh_get_all(session, url):
+    """
+    GET every page of a REST list endpoint (per_page=PER_PAGE) and return the concatenated items.
+    If the first page's Link header has rel="last", pages 2..last are requested concurrently;
+    otherwise rel="next" is followed until it disappears. Returns None if the first page fails.
+    """
+    params = {"per_page": PER_PAGE}
+    first, link = await _gh_request(session, "GET", url, params=params)
+    if not isinstance(first, list):
+        return first
+    items = list(first)
+    links = parse_link_header(link)
+    last = page_number(links.get("last"))
+    if last and last > 1:
+        pages = await asyncio.gather(*(gh_get(session, url, params={**params, "page": p}) for p in range(2, last + 1)))
+        for page in pages:
+            items.extend(page or [])
+        return items
+    next_url = links.get("next")
+    while next_url:
+        page, link = await _gh_request(session, "GET", next_url)
+        if not page:
+            break
+        items.extend(page)
+        next_url = parse_link_header(link).get("next")
+    return items
+
+def to_ns(values):
+    """
+    Parse GitHub timestamps (e.g. 2024-01-02T03:04:05Z) in one vectorized call.
+    Returns int64 nanoseconds since the epoch; missing/unparseable values are NAT_NS.
+    """
+    return pd.DatetimeIndex(pd.to_datetime(list(values), utc=True, format="ISO8601", errors="coerce")).as_unit("ns").asi8
 
 def hours_between(a, b):
     if not a or not b:
         return None
     return (b - a).total_seconds() / 3600.0
 
-def collect_pr_detail(owner, repo, number):
+async def collect_pr_detail(session, owner, repo, number):
     url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}"
-    data = gh_get(url)
+    data = await gh_get(session, url)
     if not data:
         return {}
     # fields of interest
@@ -182,9 +328,9 @@ def collect_pr_detail(owner, repo, number):
         "code_churn": (data.get("additions") or 0) + (data.get("deletions") or 0),
     }
 
-def collect_reviews(owner, repo, number):
+async def collect_reviews(session, owner, repo, number):
     url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}/reviews"
-    reviews = gh_get(url) or []
+    reviews = await gh_get_all(session, url) or []
     # Normalize minimal fields
     items = []
     for rv in reviews:
@@ -196,30 +342,30 @@ def collect_reviews(owner, repo, number):
         })
     return items
 
-def collect_issue_comments(owner, repo, number):
+async def collect_issue_comments(session, owner, repo, number):
     # PRs are issues too
     url = f"https://api.github.com/repos/{owner}/{repo}/issues/{number}/comments"
-    comments = gh_get(url) or []
+    comments = await gh_get_all(session, url) or []
     return [{
         "id": c.get("id"),
         "user_login": (c.get("user") or {}).get("login"),
         "created_at": c.get("created_at")
     } for c in comments]
 
-def collect_review_comments(owner, repo, number):
+async def collect_review_comments(session, owner, repo, number):
     # review comments on code (diff)
     url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}/comments"
-    comments = gh_get(url) or []
+    comments = await gh_get_all(session, url) or []
     return [{
         "id": c.get("id"),
         "user_login": (c.get("user") or {}).get("login"),
         "created_at": c.get("created_at")
     } for c in comments]
 
-def collect_issue_events(owner, repo, number):
+async def collect_issue_events(session, owner, repo, number):
     # To find "review_requested" timestamps
     url = f"https://api.github.com/repos/{owner}/{repo}/issues/{number}/events"
-    events = gh_get(url) or []
+    events = await gh_get_all(session, url) or []
     out = []
     for e in events:
         etype = e.get("event")
@@ -231,45 +377,222 @@ def collect_issue_events(owner, repo, number):
             })
     return out
 
+async def fetch_pr_rest(session, owner, repo, number):
+    detail, reviews, icomments, rcomments, issue_events = await asyncio.gather(
+        collect_pr_detail(session, owner, repo, number),
+        collect_reviews(session, owner, repo, number),
+        collect_issue_comments(session, owner, repo, number),
+        collect_review_comments(session, owner, repo, number),
+        collect_issue_events(session, owner, repo, number),
+    )
+    return {
+        **detail,
+        "reviews": reviews,
+        "total_comments": len(icomments) + len(rcomments),
+        "review_requested_events": issue_events,
+    }
+
+def build_pr_graphql_query(targets):
+    parts = []
+    for i, (owner, repo, number) in enumerate(targets):
+        parts.append(
+            f"pr{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(repo)}) "
+            f"{{ pullRequest(number: {int(number)}) {{ {PR_GRAPHQL_FIELDS} }} }}"
+        )
+    return "query {\n" + "\n".join(parts) + "\n}"
+
+def parse_pr_graphql(pr):
+    # Same shape as fetch_pr_rest(); a missing PR yields the same empty result as failed REST calls
+    if not pr:
+        return {"reviews": [], "total_comments": 0, "review_requested_events": []}
+    reviews = [rv for rv in (pr.get("reviews") or {}).get("nodes") or [] if rv]
+    events = [ev for ev in (pr.get("timelineItems") or {}).get("nodes") or [] if ev]
+    review_comments = sum(((rv.get("comments") or {}).get("totalCount") or 0) for rv in reviews)
+    return {
+        "commits": (pr.get("commits") or {}).get("totalCount"),
+        "changed_files": pr.get("changedFiles"),
+        "additions": pr.get("additions"),
+        "deletions": pr.get("deletions"),
+        "code_churn": (pr.get("additions") or 0) + (pr.get("deletions") or 0),
+        "reviews": [{
+            "id": rv.get("databaseId"),
+            "user_login": (rv.get("author") or {}).get("login"),
+            "state": rv.get("state"),
+            "submitted_at": rv.get("submittedAt"),
+        } for rv in reviews],
+        "total_comments": ((pr.get("comments") or {}).get("totalCount") or 0) + review_comments,
+        "review_requested_events": [{
+            "event": "review_requested",
+            "created_at": ev.get("createdAt"),
+            "requested_reviewer": (ev.get("requestedReviewer") or {}).get("login"),
+        } for ev in events],
+    }
+
+async def fetch_pr_graphql(session, targets):
+    """
+    Fetch up to GRAPHQL_BATCH PRs in one GraphQL request.
+    targets: list of (owner, repo, number); returns one fetch_pr_rest()-shaped dict per target.
+    The query reads only the first 100 reviews / review requests; PRs with more are fetched over REST,
+    which pages through all of them, so the metrics don't depend on the API used.
+    """
+    resp = await gh_request(session, "POST", GRAPHQL_URL, payload={"query": build_pr_graphql_query(targets)}) or {}
+    if resp.get("errors"):
+        print(f"[WARN] GraphQL errors: {json.dumps(resp['errors'])[:200]}", flush=True)
+    data = resp.get("data") or {}
+    prs = [(data.get(f"pr{i}") or {}).get("pullRequest") for i in range(len(targets))]
+    results = [parse_pr_graphql(pr) for pr in prs]
+    truncated = [i for i, pr in enumerate(prs) if pr and any(
+        ((pr.get(conn) or {}).get("pageInfo") or {}).get("hasNextPage") for conn in ("reviews", "timelineItems"))]
+    if truncated:
+        full = await asyncio.gather(*(fetch_pr_rest(session, *targets[i]) for i in truncated))
+        for i, res in zip(truncated, full):
+            results[i] = res
+    return results
+
 def estimate_reviewer_workload_hours(pr_created_at_dt, reviews, review_requested_events):
     """
     Approximate average time between a review request and the review submission.
     Pair by reviewer login; fallback to (submitted_at - pr_created_at).
+    Timestamps are parsed once per PR and matched with np.searchsorted per reviewer.
     """
-    # Map reviewer -> list of request times (sorted)
-    req_map = {}
-    for ev in review_requested_events:
+    if not reviews:
+        return None
+    # Map reviewer -> sorted request times (int64 ns)
+    req_ts = to_ns([ev.get("created_at") for ev in review_requested_events])
+    req_by = {}
+    for ev, ts in zip(review_requested_events, req_ts):
         reviewer = ev.get("requested_reviewer")
-        ts = to_dt(ev.get("created_at"))
-        if reviewer and ts:
-            req_map.setdefault(reviewer, []).append(ts)
-    for k in req_map:
-        req_map[k].sort()
-
-    gaps = []
-    for rv in reviews:
-        reviewer = rv.get("user_login")
-        sub_dt = to_dt(rv.get("submitted_at"))
-        if not sub_dt:
-            continue
-        # find nearest prior request for this reviewer
-        chosen_req = None
-        if reviewer in req_map and req_map[reviewer]:
-            for ts in reversed(req_map[reviewer]):
-                if ts <= sub_dt:
-                    chosen_req = ts
-                    break
-        if not chosen_req:
-            chosen_req = pr_created_at_dt
-        if chosen_req and sub_dt:
-            diff_h = hours_between(chosen_req, sub_dt)
-            if diff_h is not None and diff_h >= 0:
-                gaps.append(diff_h)
-
-    if gaps:
-        return sum(gaps) / len(gaps)
+        if reviewer and ts != NAT_NS:
+            req_by.setdefault(reviewer, []).append(ts)
+
+    sub = to_ns([rv.get("submitted_at") for rv in reviews])
+    created_ns = pd.Timestamp(pr_created_at_dt).value if pr_created_at_dt else NAT_NS
+    start = np.full(len(reviews), created_ns, dtype=np.int64)
+    if req_by:
+        reviewers = np.array([rv.get("user_login") for rv in reviews], dtype=object)
+        for reviewer, times in req_by.items():
+            mask = reviewers == reviewer
+            if not mask.any():
+                continue
+            times = np.sort(np.array(times, dtype=np.int64))
+            # nearest prior (or same-instant) request for this reviewer
+            idx = np.searchsorted(times, sub[mask], side="right") - 1
+            start[mask] = np.where(idx >= 0, times[np.maximum(idx, 0)], created_ns)
+
+    ok = (sub != NAT_NS) & (start != NAT_NS)
+    gaps = (sub[ok] - start[ok]) / NS_PER_HOUR
+    gaps = gaps[gaps >= 0]
+    if gaps.size:
+        return float(gaps.mean())
     return None
 
+# Columns of the full metrics CSV, in output order, grouped by the array type they are preallocated as
+INT_COLUMNS = ["id", "number"]
+COUNT_COLUMNS = ["body_length", "commits", "changed_files", "additions", "deletions", "code_churn",
+                 "review_iterations", "total_comments"]
+FLOAT_COLUMNS = ["time_to_close_hours", "time_to_close_days", "reviewer_workload_hours"]
+OUT_COLUMNS = [
+    "id", "owner", "repo", "number", "title", "user", "user_id", "state", "created_at", "closed_at", "merged_at",
+    "is_closed", "is_merged", "time_to_close_hours", "time_to_close_days", "body_length",
+    "commits", "changed_files", "additions", "deletions", "code_churn",  # code_churn: lines only
+    "review_iterations", "total_comments", "reviewer_workload_hours", "repo_url", "html_url",
+]
+
+def alloc_columns(n):
+    """One preallocated array per output column: int64, float64 (NaN = missing) or object."""
+    out = {}
+    for c in OUT_COLUMNS:
+        if c in INT_COLUMNS:
+            out[c] = np.empty(n, dtype=np.int64)
+        elif c in COUNT_COLUMNS or c in FLOAT_COLUMNS:
+            out[c] = np.full(n, np.nan)
+        else:
+            out[c] = np.empty(n, dtype=object)
+    return out
+
+def fill_row(out, i, row, owner, repo, fetched):
+    """
+    Write the output values for one PR into position i of the alloc_columns() arrays.
+    fetched is the fetch_pr_rest()/fetch_pr_graphql() result, or None when owner/repo could not be resolved.
+    Missing numeric values are left as NaN.
+    """
+    created_dt = row["created_at_dt"].to_pydatetime() if pd.notna(row["created_at_dt"]) else None
+    closed_dt  = row["closed_at_dt"].to_pydatetime() if pd.notna(row["closed_at_dt"]) else None
+    merged_dt  = row["merged_at_dt"].to_pydatetime() if pd.notna(row["merged_at_dt"]) else None
+
+    # Time to close/merge
+    end_dt = merged_dt if merged_dt else closed_dt
+    ttc_hours = hours_between(created_dt, end_dt) if end_dt else None
+    out["time_to_close_hours"][i] = ttc_hours
+    out["time_to_close_days"][i] = (ttc_hours / 24.0) if ttc_hours is not None else None
+
+    if fetched is not None:
+        # PR detail
+        for c in ("commits", "changed_files", "additions", "deletions", "code_churn"):
+            out[c][i] = fetched.get(c)
+
+        # Reviews
+        reviews = fetched["reviews"]
+        out["review_iterations"][i] = len(reviews)
+
+        # Comments (issue + review comments)
+        out["total_comments"][i] = fetched["total_comments"]
+
+        # Reviewer workload estimate
+        out["reviewer_workload_hours"][i] = estimate_reviewer_workload_hours(created_dt, reviews, fetched["review_requested_events"])
+
+    out["id"][i] = int(row["id"])
+    out["owner"][i] = owner
+    out["repo"][i] = repo
+    out["number"][i] = int(row["number"])
+    for c in ("title", "user", "user_id", "state", "created_at", "closed_at", "merged_at", "repo_url", "html_url"):
+        out[c][i] = row.get(c)
+    out["is_closed"][i] = str(row.get("state","").lower() == "closed")
+    out["is_merged"][i] = str(pd.notna(row.get("merged_at")) and len(str(row.get("merged_at"))) > 0)
+    out["body_length"][i] = row.get("body_length")
+
+def finish_columns(out):
+    """Count columns with no missing value become int64 (as pandas would infer from ints)."""
+    for c in COUNT_COLUMNS:
+        if not np.isnan(out[c]).any():
+            out[c] = out[c].astype(np.int64)
+    return out
+
+async def fetch_all(targets, concurrency, api, cache_path=None):
+    """
+    Fetch network metrics for each (owner, repo, number) target, preserving order.
+    The semaphore bounds how many PRs (REST) or batches (GraphQL) are in flight.
+    """
+    global RESPONSE_CACHE
+    RESPONSE_CACHE = ResponseCache(cache_path) if cache_path else None
+    sem = asyncio.Semaphore(concurrency)
+    # Per-read socket timeouts (like requests' timeout=30): a total timeout would also count the wait for a pooled
+    # connection, and requests queued behind others would time out
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=REQUEST_TIMEOUT, sock_read=REQUEST_TIMEOUT)
+    # Keep-alive pool sized to the requests that can be in flight, so no request waits for
+    # (or re-handshakes) a connection; every request goes to api.github.com
+    pool = max(MAX_CONNECTIONS, concurrency * (1 if api == "graphql" else REST_CALLS_PER_PR))
+    connector = aiohttp.TCPConnector(limit=pool, limit_per_host=pool,
+                                     keepalive_timeout=KEEPALIVE_SECONDS, ttl_dns_cache=300)
+    try:
+        async with aiohttp.ClientSession(headers=gh_headers(), timeout=timeout, connector=connector) as session:
+            if api == "graphql":
+                async def run_batch(batch):
+                    async with sem:
+                        return await fetch_pr_graphql(session, batch)
+                batches = [targets[i:i + GRAPHQL_BATCH] for i in range(0, len(targets), GRAPHQL_BATCH)]
+                results = await asyncio.gather(*(run_batch(b) for b in batches))
+                return [r for batch in results for r in batch]
+
+            async def run_one(owner, repo, number):
+                async with sem:
+                    return await fetch_pr_rest(session, owner, repo, number)
+            return await asyncio.gather(*(run_one(*t) for t in targets))
+    finally:
+        if RESPONSE_CACHE is not None:
+            RESPONSE_CACHE.close()
+            RESPONSE_CACHE = None
+
 def main():
     args = parse_args()
     ids = None
@@ -299,93 +622,24 @@ def main():
     subset["merged_at_dt"]  = pd.to_datetime(subset["merged_at"],  utc=True, errors="coerce")
     subset["body_length"]   = subset["body"].fillna("").astype(str).str.len()
 
-    rows = []
-    for _, row in subset.iterrows():
-        pid = int(row["id"])
-        number = int(row["number"])
-        repo_url = row["repo_url"]
-        owner, repo = parse_owner_repo_from_repo_url(repo_url)
-        if not owner or not repo:
-            # fallback: parse from html_url https://github.com/{owner}/{repo}/pull/{number}
-            try:
-                parts = urlparse(row["html_url"])
-                segs = parts.path.strip("/").split("/")
-                owner = segs[0]; repo = segs[1]
-            except Exception:
-                owner = None; repo = None
-
-        created_dt = row["created_at_dt"].to_pydatetime() if pd.notna(row["created_at_dt"]) else None
-        closed_dt  = row["closed_at_dt"].to_pydatetime() if pd.notna(row["closed_at_dt"]) else None
-        merged_dt  = row["merged_at_dt"].to_pydatetime() if pd.notna(row["merged_at_dt"]) else None
-
-        # Time to close/merge
-        end_dt = merged_dt if merged_dt else closed_dt
-        ttc_hours = hours_between(created_dt, end_dt) if end_dt else None
-        ttc_days = (ttc_hours / 24.0) if ttc_hours is not None else None
-
-        # Defaults
-        commits = None
-        changed_files = None
-        additions = None
-        deletions = None
-        code_churn = None
-        review_iterations = None
-        total_comments = None
-        reviewer_workload_hours = None
-
-        if owner and repo:
-            # PR detail
-            detail = collect_pr_detail(owner, repo, number)
-            commits = detail.get("commits")
-            changed_files = detail.get("changed_files")
-            additions = detail.get("additions")
-            deletions = detail.get("deletions")
-            code_churn = detail.get("code_churn")
-
-            # Reviews
-            reviews = collect_reviews(owner, repo, number)
-            review_iterations = len(reviews) if reviews is not None else None
-
-            # Comments (issue + review comments)
-            icomments = collect_issue_comments(owner, repo, number)
-            rcomments = collect_review_comments(owner, repo, number)
-            if icomments is not None and rcomments is not None:
-                total_comments = len(icomments) + len(rcomments)
-
-            # Reviewer workload estimate
-            issue_events = collect_issue_events(owner, repo, number)
-            reviewer_workload_hours = estimate_reviewer_workload_hours(created_dt, reviews, issue_events)
-
-        rows.append({
-            "id": pid,
-            "owner": owner,
-            "repo": repo,
-            "number": number,
-            "title": row.get("title"),
-            "user": row.get("user"),
-            "user_id": row.get("user_id"),
-            "state": row.get("state"),
-            "created_at": row.get("created_at"),
-            "closed_at": row.get("closed_at"),
-            "merged_at": row.get("merged_at"),
-            "is_closed": str(row.get("state","").lower() == "closed"),
-            "is_merged": str(pd.notna(row.get("merged_at")) and len(str(row.get("merged_at"))) > 0),
-            "time_to_close_hours": ttc_hours,
-            "time_to_close_days": ttc_days,
-            "body_length": int(row.get("body_length")) if pd.notna(row.get("body_length")) else None,
-            "commits": commits,
-            "changed_files": changed_files,
-            "additions": additions,
-            "deletions": deletions,
-            "code_churn": code_churn,  # lines only
-            "review_iterations": review_iterations,
-            "total_comments": total_comments,
-            "reviewer_workload_hours": reviewer_workload_hours,
-            "repo_url": row.get("repo_url"),
-            "html_url": row.get("html_url"),
-        })
-
-    out_df = pd.DataFrame(rows)
+    api = args.api
+    if api == "auto":
+        api = "graphql" if "Authorization" in gh_headers() else "rest"
+
+    # Plain dicts per row (no per-row Series boxing); owner/repo parsed column-wise
+    owners, repos = resolve_owner_repos(subset)
+    records = list(zip(subset.to_dict("records"), owners, repos))
+    targets = [(owner, repo, int(row["number"])) for row, owner, repo in records if owner and repo]
+    cache_path = None if args.no_cache else args.cache
+    fetched = iter(asyncio.run(fetch_all(targets, args.concurrency, api, cache_path)))
+    # Typed column arrays filled in place (no per-row dicts, no dtype inference pass)
+    out = alloc_columns(len(records))
+    for i, (row, owner, repo) in enumerate(records):
+        fill_row(out, i, row, owner, repo, next(fetched) if owner and repo else None)
+
+    out_df = pd.DataFrame(finish_columns(out), columns=OUT_COLUMNS)
+    # low-cardinality labels repeated across PRs: dictionary-encode
+    out_df[["state", "owner", "repo"]] = out_df[["state", "owner", "repo"]].astype("category")
     out_df.to_csv(args.out_full, index=False)
 
     # Summary
@@ -1,10 +1,29 @@
+import os
 import pandas as pd
 
+try:
+    import pyarrow.parquet as pq
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
 PRS_PATH = "pull_request.csv"
 DETAILS_PATH = "pr_commit_details.csv"
 
-prs = pd.read_csv(PRS_PATH, usecols=["id", "number", "repo_url"], low_memory=False)
-details = pd.read_csv(DETAILS_PATH, usecols=["pr_id", "sha", "filename"], low_memory=False)
+def read_columns(path, usecols):
+    # With pyarrow: multithreaded CSV parse, cached to <path>.parquet so re-runs only read the needed columns
+    if not _HAS_PYARROW:
+        return pd.read_csv(path, usecols=usecols, low_memory=False)
+    cache = path + ".parquet"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        if set(usecols) <= set(pq.read_schema(cache).names):
+            return pd.read_parquet(cache, columns=usecols)
+    df = pd.read_csv(path, usecols=usecols, engine="pyarrow")
+    df.to_parquet(cache, index=False)
+    return df
+
+prs = read_columns(PRS_PATH, ["id", "number", "repo_url"])
+details = read_columns(DETAILS_PATH, ["pr_id", "sha", "filename"])
 
 def as_int_series(s):
     out = pd.to_numeric(s, errors="coerce")
@@ -16,18 +35,19 @@ details["pr_id_i64"] = as_int_series(details["pr_id"])
 print("PRS rows:", len(prs), "DETAILS rows:", len(details))
 print("PRS id NaN:", prs["id_i64"].isna().sum(), "DETAILS pr_id NaN:", details["pr_id_i64"].isna().sum())
 
-ids_prs = set(prs["id_i64"].dropna().astype("int64").unique())
-ids_det = set(details["pr_id_i64"].dropna().astype("int64").unique())
-intersection = ids_prs & ids_det
+# Hash-based intersection on Int64 indexes (no per-id Python objects)
+ids_prs = pd.Index(prs["id_i64"].dropna().unique())
+ids_det = pd.Index(details["pr_id_i64"].dropna().unique())
+intersection = ids_prs.intersection(ids_det)
 print("ID intersection size:", len(intersection))
 
 possible_number_cols = [c for c in details.columns if c.lower() in ("pr_number", "number", "pull_number")]
 if len(intersection) == 0 and possible_number_cols:
     det_num_col = possible_number_cols[0]
     details["pr_number_i64"] = as_int_series(details[det_num_col])
-    nums_prs = set(pd.to_numeric(prs["number"], errors="coerce").dropna().astype("int64").unique())
-    nums_det = set(details["pr_number_i64"].dropna().astype("int64").unique())
-    num_intersection = nums_prs & nums_det
+    nums_prs = pd.Index(as_int_series(prs["number"]).dropna().unique())
+    nums_det = pd.Index(details["pr_number_i64"].dropna().unique())
+    num_intersection = nums_prs.intersection(nums_det)
     print(f"Number intersection size (using '{det_num_col}'):", len(num_intersection))
 else:
     print("Details no pr_number")
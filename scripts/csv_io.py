@@ -0,0 +1,24 @@
+"""
+CSV writer shared by the scan scripts (get_clone_data.py, get_refactor.py).
+"""
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
+
+def write_csv(df: pd.DataFrame, path) -> None:
+    # pyarrow's multithreaded C++ writer when available. It quotes every string value and writes floats in
+    # shortest form (1.0 -> 1), which CSV readers parse back to the same values.
+    # Mixed-type object columns cannot be converted to Arrow; those frames go through pandas.
+    if _HAS_PYARROW and len(df.columns):
+        try:
+            pcsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+            return
+        except pa.ArrowException:
+            pass
+    df.to_csv(path, index=False)
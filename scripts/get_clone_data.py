@@ -1,57 +1,23 @@
 import argparse
+import csv
 import os
-import re
+from collections import deque
+from multiprocessing import Pool
+import numpy as np
 import pandas as pd
 import sqlite3
+from patterns import RE_BASIC, RE_REGEX, RE_EXCL, RE_HINTS
+from csv_io import write_csv
 
-BASIC_KEYWORDS = [
-    # English
-    r"duplicate", r"dup code", r"duplicated", r"duplication", r"copy[-\s]?paste",
-    r"clone(?:s|d|ing)?", r"code clone", r"clones?", r"remove duplication",
-    r"dedup(?:lication)?", r"refactor(?:ing)?\s+(?:dup|duplicate|duplication|clones?)",
-    r"\bDRY\b", r"redundant",
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
 
-    # Added phrases requested
-    r"duplicate(?:s|d)?",
-    r"redundan(?:t|cy)",
-    r"replicat(?:e|ed|ion|ing)",
-    r"copy",
-    r"duplicated\s+code",
-    r"source\s+code\s+duplication",
-    r"fragment\s+reus(?:e|ing)",
-    r"redundant\s+implementation",
-    r"copy[\-\s\u2012-\u2015]?\s*paste\s+code",
-    r"program\s+duplication",
-
-    # Chinese
-    r"重复代码", r"去重", r"消除重复", r"抽取方法", r"抽取函数", r"提取方法", r"提取函数", r"克隆",
-    # Other hints
-    r"boilerplate\s+reduction", r"eliminat(?:e|ing)\s+duplication"
-]
-
-REGEX_RULES = [
-    r"refactor(?:ing)?\s+(?:duplicate|duplication|clones?)",
-    r"remove\s+(?:duplicate|duplication|clones?)\s+code",
-    r"eliminat(?:e|ing)\s+(?:duplicate|duplication|clones?)",
-    r"deduplicat(?:e|ion)\s+code",
-    r"(?:extract|抽取|提取)\s+(?:method|function|方法|函数)\s+(?:to|以)?\s*(?:remove|消除)?\s*(?:duplicate|duplication|重复|克隆)",
-    r"\bDRY\b.*\b(code|代码)\b",
-]
-
-EXCLUDE_PATTERNS = [
-    r"\bgit\s+clone\b",
-    r"clone\s+the\s+repo",
-    r"docker\s+image\s+clone",
-    r"vm\s+clone",
-    r"k8s\s+clone",
-]
-
-def compile_patterns(patterns):
-    return [re.compile(p, re.I) for p in patterns]
-
-RE_BASIC = compile_patterns(BASIC_KEYWORDS)
-RE_REGEX = compile_patterns(REGEX_RULES)
-RE_EXCL  = compile_patterns(EXCLUDE_PATTERNS)
+ARROW_BLOCK_SIZE = 64 << 20  # bytes per streamed record batch
+MAX_TASKS_PER_CHILD = 20      # recycle scan workers to bound their RSS
 
 TEXT_COL_CANDIDATES = ["body"]
 
@@ -59,57 +25,107 @@ def pick_text_cols(df):
     cols = [c for c in TEXT_COL_CANDIDATES if c in df.columns]
     return cols if cols else [c for c in df.columns if df[c].dtype == "object"][:2]
 
-def row_text(row, text_cols):
-    return " \n ".join(str(row.get(c, "") or "") for c in text_cols)
-
-def hit_any(text, regex_list):
-    return next((r.pattern for r in regex_list if r.search(text)), None)
-
-def should_exclude(text):
-    return hit_any(text, RE_EXCL) is not None
+def chunk_text(df, text_cols):
+    # " \n "-joined text columns per row, lower-cased (column-wise, no per-row Python)
+    # string[pyarrow] when available: one contiguous UTF-8 buffer, handed to Arrow's regex kernels without copies
+    dtype = "string[pyarrow]" if _HAS_PYARROW else object
+    text = df[text_cols[0]].fillna("").astype(str).astype(dtype)
+    for c in text_cols[1:]:
+        text = text + " \n " + df[c].fillna("").astype(str).astype(dtype)
+    return text.str.lower()
 
 def scan_chunk(df, source_tag):
     if df.empty:
         return pd.DataFrame()
     text_cols = pick_text_cols(df)
-    out_rows = []
-    for _, row in df.iterrows():
-        t = row_text(row, text_cols).lower()
-        if not t.strip():
-            continue
-        if should_exclude(t):
-            continue
-        rule = hit_any(t, RE_REGEX)
-        kw   = hit_any(t, RE_BASIC) if rule is None else None
-        if rule or kw:
-            ctx = t[:500]
-            out = row.to_dict()
-            out["__source__"] = source_tag
-            out["__match_type__"] = "regex" if rule else "keyword"
-            out["__pattern__"] = rule or kw
-            out["__context__"] = ctx
-            out_rows.append(out)
-    return pd.DataFrame(out_rows)
-
-def scan_csv(in_path, source_tag, chunksize=100_000):
+    if not text_cols:
+        return pd.DataFrame()
+    text = chunk_text(df, text_cols)
+    # Literal prefilter: rows without any hint substring (including empty ones) skip all pattern matching
+    text = text[RE_HINTS.has_match(text)]
+    t = text[~RE_EXCL.has_match(text)]
+    # REGEX rules take precedence; BASIC keywords are only searched where no rule matched
+    rule = RE_REGEX.matched(t)
+    kw = RE_BASIC.matched(t[rule.isna()]).reindex(t.index)
+    pattern = rule.fillna(kw).dropna()
+    if pattern.empty:
+        return pd.DataFrame()
+    out = df.loc[pattern.index].copy()
+    out["__source__"] = source_tag
+    out["__match_type__"] = np.where(rule[pattern.index].notna().to_numpy(), "regex", "keyword")
+    out["__pattern__"] = pattern
+    out["__context__"] = t[pattern.index].str[:500]
+    return out.reset_index(drop=True)
+
+def csv_header(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+def iter_csv_chunks(in_path, chunksize=100_000, columns=None):
+    """
+    Yield the CSV as DataFrame chunks, optionally only `columns`.
+    With pyarrow: C++ streaming reader over ARROW_BLOCK_SIZE blocks. Every column is read as text, since the
+    streaming reader infers types from the first block only and a later block could fail to convert;
+    values are written back out as they appear in the input.
+    Without pyarrow: pandas chunks of `chunksize` rows.
+    """
+    if not _HAS_PYARROW:
+        yield from pd.read_csv(in_path, chunksize=chunksize, low_memory=False, usecols=columns)
+        return
+    names = columns or csv_header(in_path)
+    reader = pcsv.open_csv(
+        in_path,
+        read_options=pcsv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+        parse_options=pcsv.ParseOptions(newlines_in_values=True),  # PR bodies span lines
+        convert_options=pcsv.ConvertOptions(
+            include_columns=columns or [],
+            column_types={c: pa.string() for c in names},
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+def scan_csv(in_path, source_tag, chunksize=100_000, columns=None, workers=None):
+    """
+    Scan every chunk of in_path. Chunks are independent, so with workers > 1 they are scanned in a
+    process pool while the parent keeps reading; at most 2 * workers chunks are in flight, and hits
+    are collected in input order.
+    """
+    workers = workers or os.cpu_count() or 1
     hits = []
-    for chunk in pd.read_csv(in_path, chunksize=chunksize, low_memory=False):
-        hits.append(scan_chunk(chunk, source_tag))
+    if workers <= 1:
+        for chunk in iter_csv_chunks(in_path, chunksize, columns):
+            hits.append(scan_chunk(chunk, source_tag))
+    else:
+        with Pool(workers, maxtasksperchild=MAX_TASKS_PER_CHILD) as pool:
+            pending = deque()
+            for chunk in iter_csv_chunks(in_path, chunksize, columns):
+                pending.append(pool.apply_async(scan_chunk, (chunk, source_tag)))
+                if len(pending) >= 2 * workers:
+                    hits.append(pending.popleft().get())
+            hits.extend(p.get() for p in pending)
     return pd.concat(hits, ignore_index=True) if hits else pd.DataFrame()
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--file", required=True, help="all_pull_request.csv")
     ap.add_argument("--out_dir", required=True, help="output directory")
+    ap.add_argument("--columns", default=None,
+                    help="comma-separated columns to read, e.g. body,number,title,html_url "
+                         "(default: all; hits are written with these columns only)")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="processes scanning chunks in parallel (default: CPU count; 1 = serial)")
     args = ap.parse_args()
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
 
     os.makedirs(args.out_dir, exist_ok=True)
     clone_out = os.path.join(args.out_dir, "review_clone.csv")
 
     print("Scanning file ...")
-    clone_hits = scan_csv(args.file, source_tag="file")
+    clone_hits = scan_csv(args.file, source_tag="file", columns=columns, workers=args.workers)
 
-    clone_hits.to_csv(clone_out, index=False)
+    write_csv(clone_hits, clone_out)
     print(f"Saved: {clone_out} ({len(clone_hits)})")
 
     # conn = sqlite3.connect("pr_clone_hits.db")
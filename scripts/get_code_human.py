@@ -6,14 +6,23 @@
 #
 import pandas as pd
 import requests
+import aiohttp
+import asyncio
 import json
+import gzip
 import time
 import os
 from urllib.parse import urlparse
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
-import csv
+import sqlite3
+
+try:
+    import zstandard
+    _HAS_ZSTD = True
+except Exception:
+    _HAS_ZSTD = False
 #
 # # Configure logging
 logging.basicConfig(
@@ -26,29 +35,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Contents endpoint media type that returns the file itself instead of base64 inside JSON
+RAW_HEADERS = {'Accept': 'application/vnd.github.raw'}
+# File contents kept per run, keyed by (owner, repo, ref, path); PRs on the same repo often share a parent commit
+CONTENT_CACHE_SIZE = 10_000
+
 
 class PullRequestScraper:
-    def __init__(self, github_token: Optional[str] = None):
+    def __init__(self, github_token: Optional[str] = None, max_concurrency: int = 16):
         """
         Initialize the scraper
 
         Args:
             github_token: GitHub API token (recommended to increase request limits)
+            max_concurrency: Maximum number of GitHub API requests in flight
         """
-        self.session = requests.Session()
+        self.headers = {}
         if github_token:
-            self.session.headers.update({
+            self.headers.update({
                 'Authorization': f'token {github_token}',
                 'Accept': 'application/vnd.github.v3+json'
             })
         else:
             logger.warning("No GitHub token, requests may face strict limitations")
+        self.max_concurrency = max_concurrency
+        # Shared keep-alive aiohttp session and request cap, created inside the event loop by scrape_from_csv
+        self.session = None
+        self.semaphore = None
+        # While rate-limited, every request waits until this timestamp
+        self.resume_at = 0.0
+        # (owner, repo, ref, path) -> task fetching that file's content, reset by every scrape_rows run
+        self.content_cache = {}
 
         # Create output directories
         self.output_dir = 'pr_data'
         os.makedirs(self.output_dir, exist_ok=True)
-        os.makedirs(f'{self.output_dir}/files', exist_ok=True)
-        os.makedirs(f'{self.output_dir}/diffs', exist_ok=True)
+        # One compressed JSON record per PR, appended across runs (zstd when installed, gzip otherwise)
+        self.output_path = f'{self.output_dir}/prs.jsonl.zst' if _HAS_ZSTD else f'{self.output_dir}/prs.jsonl.gz'
+        self.compress = zstandard.ZstdCompressor().compress if _HAS_ZSTD else gzip.compress
+        self.output = None
 
     def parse_pr_url(self, html_url: str) -> tuple:
         """
@@ -67,7 +92,42 @@ class PullRequestScraper:
         pr_number = parts[-1]
         return owner, repo, pr_number
 
-    def get_pr_commits(self, owner: str, repo: str, pr_number: str) -> List[Dict]:
+    async def get_json(self, url: str, max_retries: int = 3, raw: bool = False):
+        """
+        GET a GitHub API URL and decode the JSON body
+
+        An exhausted rate limit (X-RateLimit-Remaining: 0, or a Retry-After on a secondary limit)
+        pauses all requests until the reset time, then the request is retried.
+
+        Args:
+            url: API URL
+            max_retries: Attempts before giving up on a rate-limited request
+            raw: Request the raw media type and return the body bytes undecoded
+
+        Returns:
+            Decoded JSON, or bytes if raw (raises on HTTP errors)
+        """
+        for attempt in range(max_retries):
+            wait = self.resume_at - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with self.semaphore:
+                async with self.session.get(url, headers=RAW_HEADERS if raw else None) as response:
+                    if response.status in (403, 429):
+                        retry_after = response.headers.get('Retry-After')
+                        reset = response.headers.get('X-RateLimit-Reset')
+                        if retry_after or (response.headers.get('X-RateLimit-Remaining') == '0' and reset):
+                            wait = int(retry_after) if retry_after else max(0, int(reset) - int(time.time())) + 1
+                            self.resume_at = max(self.resume_at, time.time() + wait)
+                            logger.warning(f"Rate limit reached, pausing requests for {wait}s")
+                            continue
+                    response.raise_for_status()
+                    if raw:
+                        return await response.read()
+                    return await response.json(content_type=None)
+        raise RuntimeError(f"Rate limit still exhausted after {max_retries} attempts: {url}")
+
+    async def get_pr_commits(self, owner: str, repo: str, pr_number: str) -> List[Dict]:
         """
         Get all commits in a PR
 
@@ -81,14 +141,12 @@ class PullRequestScraper:
         """
         url = f'https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}/commits'
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
+            return await self.get_json(url)
         except Exception as e:
             logger.error(f"Failed to get PR {pr_number} commits: {e}")
             return []
 
-    def get_pr_files(self, owner: str, repo: str, pr_number: str) -> List[Dict]:
+    async def get_pr_files(self, owner: str, repo: str, pr_number: str) -> List[Dict]:
         """
         Get the list of modified files in a PR
 
@@ -102,16 +160,42 @@ class PullRequestScraper:
         """
         url = f'https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}/files'
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
+            return await self.get_json(url)
         except Exception as e:
             logger.error(f"Failed to get PR {pr_number} files: {e}")
             return []
 
-    def get_file_content(self, owner: str, repo: str, file_path: str, ref: str) -> Optional[str]:
+    async def get_file_content(self, owner: str, repo: str, file_path: str, ref: str) -> Optional[str]:
         """
         Get the full content of a file in a specific commit
+        (cached per run; concurrent requests for the same file share one fetch)
+
+        Args:
+            owner: Repository owner
+            repo: Repository name
+            file_path: File path
+            ref: commit SHA or branch name
+
+        Returns:
+            File content or None
+        """
+        key = (owner, repo, ref, file_path)
+        task = self.content_cache.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.fetch_file_content(owner, repo, file_path, ref))
+            self.content_cache[key] = task
+            if len(self.content_cache) > CONTENT_CACHE_SIZE:
+                # Dicts keep insertion order: drop the oldest entry
+                self.content_cache.pop(next(iter(self.content_cache)))
+        content = await task
+        if content is None:
+            # Do not keep failures, a later PR may succeed
+            self.content_cache.pop(key, None)
+        return content
+
+    async def fetch_file_content(self, owner: str, repo: str, file_path: str, ref: str) -> Optional[str]:
+        """
+        Download a file at a specific commit (raw media type: no JSON or base64 decoding)
 
         Args:
             owner: Repository owner
@@ -124,14 +208,8 @@ class PullRequestScraper:
         """
         url = f'https://api.github.com/repos/{owner}/{repo}/contents/{file_path}?ref={ref}'
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # GitHub API returns content in base64 encoding
-            import base64
-            content = base64.b64decode(data['content']).decode('utf-8')
-            return content
+            data = await self.get_json(url, raw=True)
+            return data.decode('utf-8')
         except Exception as e:
             logger.error(f"Failed to get content from {file_path} @ {ref}: {e}")
             return None
@@ -139,7 +217,11 @@ class PullRequestScraper:
     def save_pr_data(self, pr_info: Dict, commits: List[Dict], files: List[Dict],
                      file_contents: Dict[str, Dict]) -> None:
         """
-        Save PR data to files
+        Append PR data as one line of the compressed JSONL output
+
+        The record holds the PR information, commits and files; each file entry carries its diff (patch)
+        and full contents before/after. Every record is compressed as its own complete frame (gzip member),
+        so the file stays readable as one stream if a run stops mid-way, and later runs simply append.
 
         Args:
             pr_info: Basic PR information
@@ -147,46 +229,29 @@ class PullRequestScraper:
             files: List of files
             file_contents: Dictionary of file contents
         """
-        pr_number = pr_info['number']
+        # File entries as returned by the API (diff in 'patch') plus the full contents
+        file_entries = []
+        for file_info in files:
+            content_data = file_contents.get(file_info['filename'], {})
+            file_entries.append({**file_info,
+                                 'before': content_data.get('before') or None,
+                                 'after': content_data.get('after') or None})
 
-        # Save PR basic information and commits
         pr_data = {
             'pr_info': pr_info,
             'commits': commits,
-            'files': files,
+            'files': file_entries,
             'scraped_at': datetime.now().isoformat()
         }
 
-        with open(f'{self.output_dir}/pr_{pr_number}.json', 'w', encoding='utf-8') as f:
-            json.dump(pr_data, f, indent=2, ensure_ascii=False)
+        line = json.dumps(pr_data, ensure_ascii=False, separators=(',', ':')) + '\n'
+        self.output.write(self.compress(line.encode('utf-8')))
+        self.output.flush()
 
-        # Save each file’s content and diff
-        for file_info in files:
-            filename = file_info['filename'].replace('/', '_')
-            safe_filename = f"pr_{pr_number}_{filename}"
-
-            # Save diff
-            if 'patch' in file_info:
-                with open(f'{self.output_dir}/diffs/{safe_filename}.diff', 'w', encoding='utf-8') as f:
-                    f.write(file_info['patch'])
-
-            # Save full file content (if obtained)
-            if file_info['filename'] in file_contents:
-                content_data = file_contents[file_info['filename']]
-
-                # Save content before modification
-                if 'before' in content_data and content_data['before']:
-                    with open(f'{self.output_dir}/files/{safe_filename}_before.txt', 'w', encoding='utf-8') as f:
-                        f.write(content_data['before'])
-
-                # Save content after modification
-                if 'after' in content_data and content_data['after']:
-                    with open(f'{self.output_dir}/files/{safe_filename}_after.txt', 'w', encoding='utf-8') as f:
-                        f.write(content_data['after'])
-
-    def scrape_pr(self, pr_info: Dict) -> bool:
+    async def scrape_pr(self, pr_info: Dict) -> bool:
         """
         Scrape all related information of a single PR
+        (before/after contents of all files are fetched concurrently)
 
         Args:
             pr_info: PR information dictionary
@@ -199,19 +264,25 @@ class PullRequestScraper:
             logger.info(f"Start crawling PR {pr_number}: {pr_info['title']}")
 
             # Get commits
-            commits = self.get_pr_commits(owner, repo, pr_number)
+            commits = await self.get_pr_commits(owner, repo, pr_number)
             if not commits:
                 logger.warning(f"No commits in PR {pr_number}")
                 return False
 
             # Get file list
-            files = self.get_pr_files(owner, repo, pr_number)
+            files = await self.get_pr_files(owner, repo, pr_number)
             if not files:
                 logger.warning(f"PR {pr_number} no modified files found")
                 return False
 
-            # Get file contents
+            # Get file contents: collect every (file, before/after, ref) request, then fetch them together
+            parent_sha = None
+            if commits[0].get('parents'):
+                parent_sha = commits[0]['parents'][0]['sha']
+            last_commit_sha = commits[-1]['sha']
+
             file_contents = {}
+            fetches = []
             for file_info in files:
                 file_path = file_info['filename']
 
@@ -219,23 +290,20 @@ class PullRequestScraper:
                 if file_info.get('status') == 'removed':
                     continue
 
-                content_data = {}
+                file_contents[file_path] = {}
 
                 # Use the parent of the first commit as the version before modification
-                if file_info.get('status') != 'added' and commits:
-                    first_commit = commits[0]
-                    if first_commit.get('parents'):
-                        parent_sha = first_commit['parents'][0]['sha']
-                        before_content = self.get_file_content(owner, repo, file_path, parent_sha)
-                        content_data['before'] = before_content
+                if file_info.get('status') != 'added' and parent_sha:
+                    fetches.append((file_path, 'before', parent_sha))
 
                 # Get modified content (using the last commit)
-                if commits:
-                    last_commit_sha = commits[-1]['sha']
-                    after_content = self.get_file_content(owner, repo, file_path, last_commit_sha)
-                    content_data['after'] = after_content
+                fetches.append((file_path, 'after', last_commit_sha))
 
-                file_contents[file_path] = content_data
+            contents = await asyncio.gather(*(
+                self.get_file_content(owner, repo, file_path, ref) for file_path, _, ref in fetches
+            ))
+            for (file_path, side, _), content in zip(fetches, contents):
+                file_contents[file_path][side] = content
 
             # Save data
             self.save_pr_data(pr_info, commits, files, file_contents)
@@ -248,7 +316,8 @@ class PullRequestScraper:
             return False
 
     def scrape_from_csv(self, csv_file: str, max_prs: Optional[int] = None,
-                        start_from: int = 0, delay: float = 1.0) -> None:
+                        start_from: int = 0, delay: float = 0.0,
+                        usecols: Optional[List[str]] = None, max_concurrent_prs: int = 4) -> None:
         """
         Read PR list from CSV file and scrape
 
@@ -256,11 +325,15 @@ class PullRequestScraper:
             csv_file: Path to CSV file
             max_prs: Maximum number of PRs to scrape (None means all)
             start_from: Start from which PR index
-            delay: Delay between requests (seconds)
+            delay: Minimum delay between starting consecutive PRs (seconds); rate limits are
+                   handled from the response headers, so 0 is fine
+            usecols: Columns to read (None means all); must include number, html_url and title.
+                     The row is saved as pr_info, so only these columns end up in the JSON.
+            max_concurrent_prs: Number of PRs scraped at the same time
         """
         logger.info(f"Start read PR from {csv_file}")
 
-        df = pd.read_csv(csv_file)
+        df = pd.read_csv(csv_file, usecols=usecols)
         logger.info(f"found {len(df)} PR")
 
         if start_from > 0:
@@ -271,47 +344,108 @@ class PullRequestScraper:
             df = df.head(max_prs)
             logger.info(f"Limit scraping {max_prs} PRs")
 
-        progress_file = 'scraper_progress.csv'
-        processed_prs = set()
+        progress_conn = self.open_progress_db('scraper_progress.db', legacy_csv='scraper_progress.csv')
+        try:
+            processed_prs = {pr for (pr,) in progress_conn.execute("SELECT pr_number FROM progress")}
+            if processed_prs:
+                logger.info(f"Found {len(processed_prs)} completed PR")
 
-        if os.path.exists(progress_file):
-            with open(progress_file, 'r') as f:
-                reader = csv.reader(f)
-                next(reader)
-                for row in reader:
-                    if row:
-                        processed_prs.add(int(row[0]))
-            logger.info(f"Found {len(processed_prs)} completed PR")
+            # Plain dicts with native Python values (no per-row Series construction)
+            rows = df.to_dict(orient='records')
+            counts = asyncio.run(self.scrape_rows(rows, processed_prs, progress_conn, delay, max_concurrent_prs))
+        finally:
+            progress_conn.close()
 
-        success_count = 0
-        error_count = 0
+        logger.info(f"Complete crawling: success {counts['success']}, fail {counts['error']}")
 
-        for index, row in df.iterrows():
-            pr_number = row['number']
+    def open_progress_db(self, db_path: str, legacy_csv: Optional[str] = None) -> sqlite3.Connection:
+        """
+        Open the progress table (one row per successfully scraped PR)
 
-            if pr_number in processed_prs:
-                logger.info(f"Skip crawled PR {pr_number}")
-                continue
+        WAL journal with synchronous=NORMAL: each PR's commit is an append to the WAL file, without an fsync.
 
-            success = self.scrape_pr(row.to_dict())
+        Args:
+            db_path: SQLite file
+            legacy_csv: Progress CSV written by earlier versions; imported once when the table is empty
 
-            if success:
-                success_count += 1
+        Returns:
+            Open connection
+        """
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS progress "
+                     "(pr_number INTEGER PRIMARY KEY, status TEXT, timestamp TEXT)")
+
+        empty = conn.execute("SELECT 1 FROM progress LIMIT 1").fetchone() is None
+        if empty and legacy_csv and os.path.exists(legacy_csv) and os.path.getsize(legacy_csv) > 0:
+            # One C-level parse of the whole file instead of a csv.reader loop
+            legacy = pd.read_csv(legacy_csv, usecols=['pr_number', 'status', 'timestamp'],
+                                 dtype={'pr_number': 'int64', 'status': str, 'timestamp': str})
+            conn.executemany("INSERT OR IGNORE INTO progress VALUES (?, ?, ?)",
+                             zip(legacy['pr_number'].tolist(), legacy['status'].tolist(), legacy['timestamp'].tolist()))
+            conn.commit()
+        return conn
+
+    async def scrape_rows(self, rows: List[Dict], processed_prs: set, progress_conn: sqlite3.Connection,
+                          delay: float, max_concurrent_prs: int) -> Dict[str, int]:
+        """
+        Scrape PR rows concurrently over one keep-alive aiohttp session
 
-                with open(progress_file, 'a', newline='') as f:
-                    writer = csv.writer(f)
-                    if os.path.getsize(progress_file) == 0:
-                        writer.writerow(['pr_number', 'status', 'timestamp'])
-                    writer.writerow([pr_number, 'success', datetime.now().isoformat()])
-            else:
-                error_count += 1
+        Args:
+            rows: PR information dictionaries
+            processed_prs: PR numbers to skip
+            progress_conn: Progress database that successful PR numbers are recorded in
+            delay: Minimum delay between starting consecutive PRs (seconds)
+            max_concurrent_prs: Number of PRs scraped at the same time
 
-            time.sleep(delay)
+        Returns:
+            {'success': n, 'error': n}
+        """
+        counts = {'success': 0, 'error': 0}
+        pr_slots = asyncio.Semaphore(max_concurrent_prs)
 
-            if (success_count + error_count) % 10 == 0:
-                logger.info(f"Progress: Success {success_count}, Fail {error_count}")
+        async def run_one(row):
+            pr_number = row['number']
+            async with pr_slots:
+                success = await self.scrape_pr(row)
 
-        logger.info(f"Complete crawling: success {success_count}, fail {error_count}")
+            if success:
+                counts['success'] += 1
+
+                # Committed per PR, right after its data was written: a resumed run never skips unsaved PRs
+                progress_conn.execute("INSERT OR IGNORE INTO progress VALUES (?, 'success', ?)",
+                                      (pr_number, datetime.now().isoformat()))
+                progress_conn.commit()
+            else:
+                counts['error'] += 1
+
+            if (counts['success'] + counts['error']) % 10 == 0:
+                logger.info(f"Progress: Success {counts['success']}, Fail {counts['error']}")
+
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=60)
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=timeout) as session:
+            self.session = session
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.content_cache = {}
+            self.output = open(self.output_path, 'ab')
+            try:
+                tasks = []
+                for row in rows:
+                    if row['number'] in processed_prs:
+                        logger.info(f"Skip crawled PR {row['number']}")
+                        continue
+                    tasks.append(asyncio.create_task(run_one(row)))
+                    if delay:
+                        await asyncio.sleep(delay)
+                await asyncio.gather(*tasks)
+            finally:
+                self.session = None
+                self.content_cache = {}
+                self.output.close()
+                self.output = None
+        return counts
 
 
 def main():
@@ -332,7 +466,7 @@ def main():
     csv_file = 'human_pull_request.csv'
     max_prs = None
     start_from = 0
-    delay = 2.0
+    delay = 0.0
 
     try:
         scraper.scrape_from_csv(csv_file, max_prs=max_prs,
@@ -1,7 +1,8 @@
 import pandas as pd
 import sqlite3
-import re
 import os
+from patterns import KEYWORDS_EN, EXCLUDE_PATTERNS, compile_any
+from csv_io import write_csv
 
 # Path to your CSV file
 file_path = "pull_request.csv"
@@ -70,58 +71,22 @@ ref_task_ids = (
 tasktype_refactor_df = df[df[pr_id_col].astype(str).isin(ref_task_ids)].copy()
 
 # ---- Fifth case: From task-type refactor, further filter by keyword/regex rules in title/body ----
-BASIC_KEYWORDS = [
-    # English
-    r"duplicate", r"dup code", r"duplicated", r"duplication", r"copy[-\s]?paste",
-    r"clone(?:s|d|ing)?", r"code clone", r"clones?", r"remove duplication",
-    r"dedup(?:lication)?", r"refactor(?:ing)?\s+(?:dup|duplicate|duplication|clones?)",
-    r"\bDRY\b", r"redundant",
-
-    # Added phrases requested
-    r"duplicate(?:s|d)?",
-    r"redundan(?:t|cy)",
-    r"replicat(?:e|ed|ion|ing)",
-    r"copy",
-    r"duplicated\s+code",
-    r"source\s+code\s+duplication",
-    r"fragment\s+reus(?:e|ing)",
-    r"redundant\s+implementation",
-    r"copy[\-\s\u2012-\u2015]?\s*paste\s+code",
-    r"program\s+duplication",
-
-    # Other hints
-    r"boilerplate\s+reduction", r"eliminat(?:e|ing)\s+duplication"
-]
-
-REGEX_RULES = [
-    r"refactor(?:ing)?\s+(?:duplicate|duplication|clones?)",
-    r"remove\s+(?:duplicate|duplication|clones?)\s+code",
-    r"eliminat(?:e|ing)\s+(?:duplicate|duplication|clones?)",
-    r"deduplicat(?:e|ion)\s+code",
-    r"(?:extract)\s+(?:method|function)\s+(?:to|以)?\s*(?:remove)?\s*(?:duplicate|duplication)",
-    r"\bDRY\b.*\b(code)\b",
-]
-
-EXCLUDE_PATTERNS = [
-    r"\bgit\s+clone\b",
-    r"clone\s+the\s+repo",
-    r"docker\s+image\s+clone",
-    r"vm\s+clone",
-    r"k8s\s+clone",
-]
-
-include_pattern = r"(?:" + "|".join(BASIC_KEYWORDS + REGEX_RULES) + r")"
-exclude_pattern = r"(?:" + "|".join(EXCLUDE_PATTERNS) + r")"
-
-def _contains(series: pd.Series, pattern: str) -> pd.Series:
-    return series.astype(str).str.contains(pattern, flags=re.IGNORECASE, regex=True, na=False)
-
-inc_title = _contains(tasktype_refactor_df['title'], include_pattern)
-inc_body = _contains(tasktype_refactor_df['body'], include_pattern)
-exc_title = _contains(tasktype_refactor_df['title'], exclude_pattern)
-exc_body = _contains(tasktype_refactor_df['body'], exclude_pattern)
-
-tasktype_refactor_regex_df = tasktype_refactor_df[(inc_title | inc_body) & ~(exc_title | exc_body)].copy()
+# Pattern lists are shared with get_clone_data.py (patterns.py). This scan is English-only: the English
+# alternatives of REGEX_RULES (refactor/remove/eliminate ... duplicate|clone, deduplicate code, DRY ... code)
+# each contain one of KEYWORDS_EN, so the English keywords alone decide inclusion.
+include_re = compile_any(tuple(KEYWORDS_EN))
+exclude_re = compile_any(tuple(EXCLUDE_PATTERNS))
+
+def _contains(series: pd.Series, regex) -> pd.Series:
+    return series.astype(str).map(lambda t: regex.search(t) is not None, na_action='ignore').fillna(False).astype(bool)
+
+# Title and body searched as one string, so each regex runs once per row. No pattern can match across
+# the "\n\x00" separator: "." stops at the "\n", and \s and literals stop at the "\x00" (\s would match
+# the "\n"). So a hit never spans the two fields.
+title_body = (tasktype_refactor_df['title'].fillna('').astype(str) + '\n\x00'
+              + tasktype_refactor_df['body'].fillna('').astype(str))
+
+tasktype_refactor_regex_df = tasktype_refactor_df[_contains(title_body, include_re) & ~_contains(title_body, exclude_re)].copy()
 
 # Remove match_type column if it exists
 tasktype_refactor_regex_df = tasktype_refactor_regex_df.drop(columns=['match_type'], errors='ignore')
@@ -131,6 +96,10 @@ def save_to_db(db_path: str, table_name: str, dataf: pd.DataFrame):
     with sqlite3.connect(db_path) as conn:
         dataf.to_sql(table_name, conn, if_exists='replace', index=False)
 
+# Helper to save a DataFrame into a CSV file (pyarrow writer when available, see csv_io.py)
+def save_to_csv(csv_path: str, dataf: pd.DataFrame):
+    write_csv(dataf, csv_path)
+
 
 # Save each case to its own DB file (table name: pull_requests)
 save_to_db('refactor_data/curated_agent/PRs_TitleRefactor.db', 'pull_requests', title_only_df)
@@ -140,11 +109,11 @@ save_to_db('refactor_data/curated_agent/PRs_TagRefactor.db', 'pull_requests', ta
 save_to_db('refactor_data/curated_agent/PRs_TagRefactorKeywordClone.db', 'pull_requests', tasktype_refactor_regex_df)
 
 # Also save to CSV files
-title_only_df.to_csv('refactor_data/curated_agent/PRs_TitleRefactor.csv', index=False)
-body_only_df.to_csv('refactor_data/curated_agent/PRs_DescriptionRefactor.csv', index=False)
-both_df.to_csv('refactor_data/curated_agent/PRs_TitleDescriptionRefactor.csv', index=False)
-tasktype_refactor_df.to_csv('refactor_data/curated_agent/PRs_TagRefactor.csv', index=False)
-tasktype_refactor_regex_df.to_csv('refactor_data/curated_agent/PRs_TagRefactorKeywordClone.csv', index=False)
+save_to_csv('refactor_data/curated_agent/PRs_TitleRefactor.csv', title_only_df)
+save_to_csv('refactor_data/curated_agent/PRs_DescriptionRefactor.csv', body_only_df)
+save_to_csv('refactor_data/curated_agent/PRs_TitleDescriptionRefactor.csv', both_df)
+save_to_csv('refactor_data/curated_agent/PRs_TagRefactor.csv', tasktype_refactor_df)
+save_to_csv('refactor_data/curated_agent/PRs_TagRefactorKeywordClone.csv', tasktype_refactor_regex_df)
 
 # Print summary
 print(f"Total matches (title/body search): {len(result_df)}")
@@ -0,0 +1,148 @@
+"""
+Keyword, rule and exclusion patterns shared by the duplication scans (get_clone_data.py, get_refactor.py),
+compiled once per process.
+"""
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+try:
+    import re2  # google-re2: linear-time DFA matching, no backtracking
+    _HAS_RE2 = True
+except Exception:
+    _HAS_RE2 = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
+# Each keyword is a substring search, so any phrase containing another entry is already covered by it
+# (e.g. "copy" covers every copy-paste variant, "duplicat(?:e|ion)" covers "duplicated code")
+KEYWORDS_EN = [
+    r"duplicat(?:e|ion)", r"dup code", r"refactor(?:ing)?\s+dup", r"dedup",
+    r"clone", r"copy", r"redundan(?:t|cy)", r"replicat(?:e|ion|ing)", r"\bDRY\b",
+    r"fragment\s+reus(?:e|ing)", r"boilerplate\s+reduction",
+]
+
+KEYWORDS_ZH = [
+    r"重复代码", r"去重", r"消除重复", r"(?:抽取|提取)(?:方法|函数)", r"克隆",
+]
+
+BASIC_KEYWORDS = KEYWORDS_EN + KEYWORDS_ZH
+
+REGEX_RULES = [
+    r"refactor(?:ing)?\s+(?:duplicate|duplication|clones?)",
+    r"remove\s+(?:duplicate|duplication|clones?)\s+code",
+    r"eliminat(?:e|ing)\s+(?:duplicate|duplication|clones?)",
+    r"deduplicat(?:e|ion)\s+code",
+    r"(?:extract|抽取|提取)\s+(?:method|function|方法|函数)\s+(?:to|以)?\s*(?:remove|消除)?\s*(?:duplicate|duplication|重复|克隆)",
+    r"\bDRY\b.*\b(code|代码)\b",
+]
+
+# Literal substrings (lower-case), at least one of which occurs in every BASIC_KEYWORDS or REGEX_RULES match:
+# rows containing none of them cannot be hits, so a cheap literal search can drop them before the full patterns run
+LITERAL_HINTS = [
+    "dup", "clone", "copy", "redundan", "replicat", "dry", "fragment", "boilerplate",
+    "重复", "去重", "抽取", "提取", "克隆",
+]
+
+EXCLUDE_PATTERNS = [
+    r"\bgit\s+clone\b",
+    r"clone\s+the\s+repo",
+    r"docker\s+image\s+clone",
+    r"vm\s+clone",
+    r"k8s\s+clone",
+]
+
+# \b, \s, \w and \d (and their negations) are Unicode-aware in Python's re but ASCII-only in RE2: RE2 sees a word
+# boundary between "dry" and adjacent Chinese text, so it matches more there, and does not take NBSP or U+3000 as
+# a space. What matters is the text, not the pattern, so any pattern using one of these classes stays on re.
+_UNICODE_CLASS = re.compile(r"(?<!\\)(?:\\\\)*\\[bBsSwWdD]")
+
+def re2_compatible(patterns):
+    return not any(_UNICODE_CLASS.search(p) for p in patterns)
+
+def re2_source(pattern):
+    # RE2 spells \uXXXX as \x{XXXX} and takes flags inline
+    return "(?i)" + re.sub(r"\\u([0-9a-fA-F]{4})", r"\\x{\1}", pattern)
+
+@lru_cache(maxsize=None)
+def compile_any(patterns):
+    """
+    One case-insensitive regex matching any of `patterns` (a tuple), compiled once per process:
+    google-re2 when installed and the patterns are RE2-compatible, Python's re otherwise.
+    """
+    source = "(?:" + "|".join(patterns) + ")"
+    if _HAS_RE2 and re2_compatible(patterns):
+        return re2.compile(re2_source(source))
+    return re.compile(source, re.IGNORECASE)
+
+class PatternSet:
+    """
+    One master alternation over a pattern list, each pattern in its own named group (p0, p1, ...):
+    a single search both detects a hit and tells which pattern produced it.
+    Engines, fastest first: Arrow's RE2 compute kernels over a whole string[pyarrow] column,
+    google-re2 per row, Python's re per row. RE2 is only used for RE2-compatible lists.
+    """
+    def __init__(self, patterns):
+        self.patterns = patterns
+        master = "|".join(f"(?P<p{i}>{p})" for i, p in enumerate(patterns))
+        self.re2_source = re2_source(master)
+        re2_ok = re2_compatible(patterns)
+        self.regex = re2.compile(self.re2_source) if _HAS_RE2 and re2_ok else re.compile(master, re.I)
+        # Arrow's kernels are RE2 too, so the same re2_compatible gate applies; extract_regex only accepts named groups
+        self.arrow = _HAS_PYARROW and re2_ok and re.compile(master).groups == len(patterns)
+
+    def has_match(self, text):
+        if self.arrow:
+            hit = pc.fill_null(pc.match_substring_regex(pa.array(text), self.re2_source), False)
+            return pd.Series(hit.to_numpy(zero_copy_only=False), index=text.index)
+        return text.map(lambda t: self.regex.search(t) is not None).astype(bool)
+
+    def matched(self, text):
+        # pattern string of the leftmost match in each row; None where nothing matches
+        if self.arrow:
+            groups = pc.extract_regex(pa.array(text), self.re2_source)
+            labels = np.full(len(text), None, dtype=object)
+            for i, p in enumerate(self.patterns):
+                # exactly one named group takes part in a match; the others extract as ""
+                hit = pc.fill_null(pc.greater(pc.utf8_length(pc.struct_field(groups, [i])), 0), False)
+                labels[hit.to_numpy(zero_copy_only=False)] = p
+            return pd.Series(labels, index=text.index)
+        def label(m):
+            if m is None:
+                return None
+            name = next(k for k, v in m.groupdict().items() if v is not None)
+            return self.patterns[int(name[1:])]
+        return text.map(lambda t: label(self.regex.search(t)))
+
+RE_BASIC = PatternSet(BASIC_KEYWORDS)
+RE_REGEX = PatternSet(REGEX_RULES)
+RE_EXCL  = PatternSet(EXCLUDE_PATTERNS)
+RE_HINTS = PatternSet([re.escape(h) for h in LITERAL_HINTS])
+
+
+if __name__ == "__main__":
+    # Regression check: whichever engine each pattern set picked must agree with Python's re, in particular next to
+    # CJK text and across NBSP / U+3000 spaces, where RE2's ASCII-only \b and \s differ.
+    # Run it with and without google-re2 / pyarrow installed.
+    sample = [
+        "遵循dry原则", "dry原则代码", "dry code", "dry run", "git\u00a0clone here", "vm\u3000clone", "vm clone",
+        "k8s clone", "fragment\u3000reuse", "消除重复代码", "提取 方法 以 消除 重复", "extract method to remove duplication",
+        "refactoring\u00a0clones", "copy-paste", "boilerplate reduction", "nothing here", "",
+    ]
+    dtypes = [object] + (["string[pyarrow]"] if _HAS_PYARROW else [])
+    for name, ps in [("RE_BASIC", RE_BASIC), ("RE_REGEX", RE_REGEX), ("RE_EXCL", RE_EXCL), ("RE_HINTS", RE_HINTS)]:
+        ref = re.compile("|".join(f"(?P<p{i}>{p})" for i, p in enumerate(ps.patterns)), re.I)
+        expected = [next((ps.patterns[int(k[1:])] for k, v in m.groupdict().items() if v is not None), None)
+                    if m else None for m in map(ref.search, sample)]
+        for dtype in dtypes:
+            text = pd.Series(sample, dtype=dtype)
+            assert ps.has_match(text).tolist() == [e is not None for e in expected], (name, dtype)
+            assert [None if pd.isna(v) else v for v in ps.matched(text)] == expected, (name, dtype)
+        engine = "arrow" if ps.arrow else type(ps.regex).__module__
+        print(f"{name}: {engine} agrees with re on {len(sample)} samples")
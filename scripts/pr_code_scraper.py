@@ -1,19 +1,54 @@
 from __future__ import annotations
+import asyncio
 import base64
+import hashlib
+import importlib.util
+import json
 import os
+import random
 import time
 import re
+import shutil
+from functools import lru_cache
+from itertools import islice
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Iterable, Tuple, Dict, Any, Union
+from typing import Optional, Iterable, List, Tuple, Dict, Any, Union
 
+import aiohttp
 import pandas as pd
-import requests
+
+# pyarrow is only needed by pandas itself, for Arrow-backed string columns
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
+# Decoder for API response bodies (bytes); orjson parses large base64 payloads several times faster
+json_loads = orjson.loads if _HAS_ORJSON else json.loads
 
 
 GITHUB_API = "https://api.github.com"
 RAW_HOST = "https://raw.githubusercontent.com"
 USER_AGENT = "pr-code-scraper/1.0"
+MAX_CONCURRENCY = 32  # requests in flight in download_pr_code_join
+MAX_PER_HOST = 16
+CONNECT_TIMEOUT = 30.0  # seconds to open a connection
+READ_TIMEOUT = 30.0  # seconds without data on the socket; no limit on the whole request, so large files can finish
+ETAG_CACHE_FILE = "etag_cache.json"  # in out_dir
+BLOB_INDEX_FILE = "blob_index.json"  # in out_dir
+GRAPHQL_BATCH = 50  # blobs per GraphQL query (keeps responses well under GitHub's size/node limits)
+
+# Column dtypes for the join inputs, so read_csv neither infers types nor boxes strings as Python objects
+_STR = "string[pyarrow]" if _HAS_PYARROW else "string"
+JOIN_DTYPES = {"id": "int64", "pr_id": "int64", "number": "int64",
+               "repo_url": _STR, "sha": _STR, "filename": _STR}
+
+
+_OWNER_REPO_RE = re.compile(r"github\.com/(?:repos/)?([^/]+)/([^/]+)")
 
 
 def parse_owner_repo(repo_url: str) -> Tuple[str, str]:
@@ -21,146 +56,525 @@ def parse_owner_repo(repo_url: str) -> Tuple[str, str]:
     Accepts either API URL (https://api.github.com/repos/OWNER/REPO) or HTML URL (https://github.com/OWNER/REPO)
     Returns (owner, repo)
     """
-    m = re.search(r"github\.com/(?:repos/)?([^/]+)/([^/]+)", repo_url)
+    m = _OWNER_REPO_RE.search(repo_url)
     if not m:
         raise ValueError(f"Unrecognized repo_url format: {repo_url}")
     owner, repo = m.group(1), m.group(2)
     return owner, repo
 
 
+_TEXT_EXTS = frozenset({
+    ".c",".cc",".cpp",".cxx",".c++",".h",".hpp",".hh",".hxx",
+    ".java",".kt",".kts",".groovy",".scala",".go",".rs",".swift",".m",".mm",
+    ".py",".rb",".php",".r",".jl",".lua",".pl",".pm",".sh",".bash",".zsh",".ps1",".bat",".cmd",
+    ".ts",".tsx",".js",".jsx",".vue",".svelte",
+    ".css",".scss",".sass",".less",".styl",".postcss",
+    ".json",".yml",".yaml",".toml",".ini",".cfg",".conf",".xml",".xsd",".xsl",".xslt",".wsdl",".svg",
+    ".md",".rst",".txt",".tex",".bib",".csv",".tsv",".proto",".gradle",".properties",".dockerfile",".env",
+    ".sql",".psql"
+})
+
+
 def is_textlike(path: str) -> bool:
-    text_exts = {
-        ".c",".cc",".cpp",".cxx",".c++",".h",".hpp",".hh",".hxx",
-        ".java",".kt",".kts",".groovy",".scala",".go",".rs",".swift",".m",".mm",
-        ".py",".rb",".php",".r",".jl",".lua",".pl",".pm",".sh",".bash",".zsh",".ps1",".bat",".cmd",
-        ".ts",".tsx",".js",".jsx",".vue",".svelte",
-        ".css",".scss",".sass",".less",".styl",".postcss",
-        ".json",".yml",".yaml",".toml",".ini",".cfg",".conf",".xml",".xsd",".xsl",".xslt",".wsdl",".svg",
-        ".md",".rst",".txt",".tex",".bib",".csv",".tsv",".proto",".gradle",".properties",".dockerfile",".env",
-        ".sql",".psql"
-    }
+    # Extension lookup; a bare dotfile (".env") is its own extension
     p = path.lower()
-    return any(p.endswith(ext) for ext in text_exts)
+    ext = os.path.splitext(p)[1] or os.path.basename(p)
+    return ext in _TEXT_EXTS
+
+
+# splitext's extension: the last ".xyz" of the file name, not counting the name's leading dots
+_EXT_RE = r"^(?:.*/)?\.*[^/.][^/]*(\.[^./]*)$"
+
+
+def textlike_mask(paths: pd.Series) -> pd.Series:
+    # Column-wise is_textlike
+    lower = paths.str.lower()
+    ext = lower.str.extract(_EXT_RE, expand=False)
+    name = lower.str.rsplit("/", n=1).str[-1]
+    return (ext.isin(_TEXT_EXTS) | name.isin(_TEXT_EXTS)).fillna(False).astype(bool)
+
+
+_made_dirs: set = set()  # directories already created by this process
+
+
+def ensure_dir(path: Path) -> None:
+    # mkdir once per directory instead of once per file
+    if path not in _made_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _made_dirs.add(path)
 
 
 def save_bytes(target: Path, content: bytes) -> None:
-    target.parent.mkdir(parents=True, exist_ok=True)
-    with open(target, "wb") as f:
-        f.write(content)
+    # Single-shot write straight to the file descriptor (no buffered file object)
+    ensure_dir(target.parent)
+    fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(content)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def link_copies(source: Path, targets: Iterable[Path]) -> None:
+    # Hard-link `source` to each target (replacing what is there); copy where the filesystem has no hard links
+    for target in targets:
+        if target.exists():
+            if os.path.samefile(source, target):
+                continue
+            target.unlink()
+        ensure_dir(target.parent)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
 
 
 def decode_base64_to_bytes(s: str) -> bytes:
     return base64.b64decode(s.encode("utf-8"), validate=True)
 
 
+def github_headers(token: Optional[str], accept: Optional[str] = None) -> Dict[str, str]:
+    h = {
+        "User-Agent": USER_AGENT,
+    }
+    if token:
+        h["Authorization"] = f"token {token}"
+    if accept:
+        h["Accept"] = accept
+    return h
+
+
+# Returned instead of content when a conditional request says the local copy is current
+NOT_MODIFIED = object()
+
+
+class EtagCache:
+    """
+    URL -> (ETag, sha256 of the body, local file it was saved to), persisted as JSON between runs.
+    A conditional request (If-None-Match) is only sent while that local file still has the recorded hash,
+    so a 304 always means the file on disk is the current content. 304s don't count against the rate limit.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, list] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.entries
+
+    def validator(self, url: str, target: Path) -> Optional[str]:
+        entry = self.entries.get(url)
+        if not entry or entry[2] != str(target) or not target.exists():
+            return None
+        with open(target, "rb") as f:
+            return entry[0] if hashlib.sha256(f.read()).hexdigest() == entry[1] else None
+
+    def store(self, url: str, etag: str, body: bytes, target: Path) -> None:
+        self.entries[url] = [etag, hashlib.sha256(body).hexdigest(), str(target)]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+
+class BlobIndex:
+    """
+    Content at a (commit sha, path) never changes, so a copy saved for one PR (or fork) can serve any other.
+    Maps "{sha}__{sha256(path)}" -> (local file, sha256 of its content), persisted as JSON between runs;
+    a copy is only reused while it still has the recorded hash.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, list] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(sha: str, filepath: str) -> str:
+        return f"{sha}__{hashlib.sha256(filepath.encode('utf-8')).hexdigest()}"
+
+    def has(self, sha: str, filepath: str) -> bool:
+        # Membership only (no file access)
+        return self.key(sha, filepath) in self.entries
+
+    def lookup(self, sha: str, filepath: str) -> Optional[Path]:
+        # Reads and hashes the recorded copy: call it from a worker thread
+        entry = self.entries.get(self.key(sha, filepath))
+        if not entry or not os.path.exists(entry[0]):
+            return None
+        with open(entry[0], "rb") as f:
+            return Path(entry[0]) if hashlib.sha256(f.read()).hexdigest() == entry[1] else None
+
+    def add(self, sha: str, filepath: str, target: Path, content: bytes) -> None:
+        self.entries[self.key(sha, filepath)] = [str(target), hashlib.sha256(content).hexdigest()]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+
+class TokenPool:
+    """
+    Round-robin over GitHub tokens (None = anonymous). Each token's quota is tracked from the X-RateLimit-*
+    headers of its responses; a token with none left sits out of the rotation until its reset time.
+    """
+    def __init__(self, tokens: List[Optional[str]]):
+        self.tokens = tokens or [None]
+        self.limits: Dict[Optional[str], Tuple[int, int]] = {}  # token -> (remaining, reset epoch)
+        self._next = 0
+
+    def _active(self, token: Optional[str], now: float) -> bool:
+        remaining, reset = self.limits.get(token, (1, 0))
+        return remaining > 0 or reset <= now
+
+    def pick(self) -> Optional[str]:
+        now = time.time()
+        for _ in range(len(self.tokens)):
+            token = self.tokens[self._next % len(self.tokens)]
+            self._next += 1
+            if self._active(token, now):
+                return token
+        # All used up: the one that resets first
+        return min(self.tokens, key=lambda t: self.limits[t][1])
+
+    def update(self, token: Optional[str], headers) -> None:
+        remaining, reset = headers.get("X-RateLimit-Remaining"), headers.get("X-RateLimit-Reset")
+        if remaining and remaining.isdigit() and reset and reset.isdigit():
+            self.limits[token] = (int(remaining), int(reset))
+
+    def exhausted(self) -> bool:
+        now = time.time()
+        return not any(self._active(t, now) for t in self.tokens)
+
+    def next_reset(self) -> int:
+        return min(self.limits[t][1] for t in self.tokens)
+
+
 @dataclass
-class HttpClient:
-    token: Optional[str] = None
+class AsyncHttpClient:
+    """
+    GitHub client over one pooled aiohttp session, with at most `concurrency` requests in flight.
+    get() returns (status, body).
+    `token` may be a list of tokens: requests rotate over them (see TokenPool), and a used-up token is retried
+    with the next one right away.
+    Retries back off exponentially with jitter (or as long as Retry-After says); connection errors and timeouts
+    are retried the same way, and give status 0 once the retries run out. When the rate limit is used up
+    on every token and resets within 2 minutes, all requests pause together until the reset instead of racing
+    into more 403s.
+    With an EtagCache, get(..., target=path) is a conditional request for a file saved at `path` (304 -> empty body).
+    """
+    session: aiohttp.ClientSession
+    token: Union[str, List[str], None] = None
     retry: int = 3
     backoff: float = 2.0
-    timeout: float = 30.0
-
-    def _headers(self, accept: Optional[str] = None) -> Dict[str, str]:
-        h = {
-            "User-Agent": USER_AGENT,
-        }
-        if self.token:
-            h["Authorization"] = f"token {self.token}"
-        if accept:
-            h["Accept"] = accept
-        return h
-
-    def get(self, url: str, params: Optional[Dict[str, Any]] = None, accept: Optional[str] = None) -> requests.Response:
+    concurrency: int = MAX_CONCURRENCY
+    etags: Optional[EtagCache] = None
+
+    def __post_init__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.tokens = TokenPool([self.token] if isinstance(self.token, str) else list(self.token or []))
+        self.resume = asyncio.Event()  # cleared while requests are paused for a rate-limit reset
+        self.resume.set()
+        self._pause = None
+
+    def _retry_delay(self, attempt: int, headers) -> float:
+        retry_after = headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return int(retry_after)
+        return self.backoff * 2 ** (attempt - 1) + random.uniform(0, self.backoff)
+
+    def _reset_at(self, headers) -> Optional[int]:
+        # Rate-limit reset time (the earliest one once every token is used up),
+        # if it is within a reasonable window (up to 2 minutes)
+        reset = str(self.tokens.next_reset()) if self.tokens.exhausted() else headers.get("X-RateLimit-Reset")
+        if reset and reset.isdigit() and 0 < int(reset) - time.time() < 120:
+            return int(reset)
+        return None
+
+    async def _pause_until(self, reset_at: int) -> None:
+        if not self.resume.is_set():
+            await self.resume.wait()
+            return
+        self.resume.clear()
+        try:
+            await asyncio.sleep(max(0.0, reset_at - time.time()) + 1)
+        finally:
+            self.resume.set()
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None, accept: Optional[str] = None,
+                  target: Optional[Path] = None) -> Tuple[int, bytes]:
+        if self.etags is None or target is None or params:
+            return await self.request("GET", url, params=params, accept=accept)
+        headers = {}
+        # The validator reads and hashes the saved file, so it runs in the thread pool
+        etag = None
+        if url in self.etags:
+            etag = await asyncio.get_running_loop().run_in_executor(None, self.etags.validator, url, target)
+        if etag:
+            headers["If-None-Match"] = etag
+        status, body, response_headers = await self._send("GET", url, accept=accept, extra_headers=headers)
+        if status == 200 and response_headers.get("ETag"):
+            self.etags.store(url, response_headers["ETag"], body, target)
+        return status, body
+
+    async def post(self, url: str, json_body: Any) -> Tuple[int, bytes]:
+        return await self.request("POST", url, json_body=json_body)
+
+    async def request(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                      accept: Optional[str] = None, json_body: Any = None) -> Tuple[int, bytes]:
+        status, body, _ = await self._send(method, url, params=params, accept=accept, json_body=json_body)
+        return status, body
+
+    async def _send(self, method: str, url: str, params: Optional[Dict[str, Any]] = None, accept: Optional[str] = None,
+                    json_body: Any = None, extra_headers: Optional[Dict[str, str]] = None):
+        # (status, body, response headers) after the retry policy
         for attempt in range(1, self.retry + 1):
-            r = requests.get(url, params=params, headers=self._headers(accept), timeout=self.timeout)
-            if r.status_code == 403 and "rate limit" in r.text.lower():
-                reset = r.headers.get("X-RateLimit-Reset")
-                wait = self.backoff * attempt
-                if reset and reset.isdigit():
-                    # Sleep until reset if it's within a reasonable window, else backoff
-                    now = time.time()
-                    delta = int(reset) - now
-                    if 0 < delta < 120:  # up to 2 minutes
-                        time.sleep(delta + 1)
-                        continue
-                time.sleep(wait)
+            await self.resume.wait()
+            token = self.tokens.pick()
+            try:
+                async with self.semaphore:
+                    async with self.session.request(method, url, params=params, json=json_body,
+                                                    headers={**github_headers(token, accept), **(extra_headers or {})}) as r:
+                        status, body, headers = r.status, await r.read(), r.headers
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                # A failed attempt like a 5xx; after the last one the caller sees status 0 and skips the file
+                status, body, headers = 0, b"", {}
+                if attempt < self.retry:
+                    await asyncio.sleep(self._retry_delay(attempt, headers))
                 continue
-            if r.status_code in (429, 502, 503, 504):
-                time.sleep(self.backoff * attempt)
+            self.tokens.update(token, headers)
+            exhausted = self.tokens.exhausted()
+            rate_limited = status == 403 and b"rate limit" in body.lower()
+            if rate_limited or status in (429, 502, 503, 504):
+                if headers.get("X-RateLimit-Remaining") == "0" and not exhausted:
+                    continue  # this token is used up; the next attempt goes out with another one
+                reset_at = self._reset_at(headers) if rate_limited or exhausted else None
+                if reset_at:
+                    await self._pause_until(reset_at)
+                else:
+                    await asyncio.sleep(self._retry_delay(attempt, headers))
                 continue
-            return r
-        return r
+            if exhausted and self.resume.is_set() and (reset_at := self._reset_at(headers)):
+                # This was the last request of the window: hold the following ones until it resets
+                self._pause = asyncio.ensure_future(self._pause_until(reset_at))
+            return status, body, headers
+        return status, body, headers
 
 
-def fetch_file_via_api(client: HttpClient, owner: str, repo: str, path: str, ref: str) -> Optional[bytes]:
-    # GitHub Contents API (returns base64 for text, raw for binary with ?)
+async def fetch_file_via_api_async(client: AsyncHttpClient, owner: str, repo: str, path: str, ref: str) -> Optional[bytes]:
+    # GitHub Contents API (base64 content in a JSON body)
     url = f"{GITHUB_API}/repos/{owner}/{repo}/contents/{path}"
-    r = client.get(url, params={"ref": ref}, accept="application/vnd.github+json")
-    if r.status_code == 200:
-        data = r.json()
-        if isinstance(data, dict) and "content" in data and data.get("encoding") == "base64":
-            try:
-                return decode_base64_to_bytes(data["content"])
-            except Exception:
-                return None
-        # If it's a directory or other type
-        return None
-    elif r.status_code == 404:
-        return None
-    else:
+    status, body = await client.get(url, params={"ref": ref}, accept="application/vnd.github+json")
+    if status != 200:
         return None
+    data = json_loads(body)
+    if isinstance(data, dict) and "content" in data and data.get("encoding") == "base64":
+        try:
+            return decode_base64_to_bytes(data["content"])
+        except Exception:
+            return None
+    return None
 
 
-def fetch_file_via_raw(owner: str, repo: str, path: str, ref: str, client: HttpClient) -> Optional[bytes]:
+async def fetch_file_via_raw_async(owner: str, repo: str, path: str, ref: str, client: AsyncHttpClient,
+                                   target: Optional[Path] = None):
     # Raw host fetch; often faster and works for large files.
     # Example: https://raw.githubusercontent.com/OWNER/REPO/REF/path/to/file
+    # NOT_MODIFIED when the copy already saved at `target` is current (see EtagCache)
     url = f"{RAW_HOST}/{owner}/{repo}/{ref}/{path}"
-    r = client.get(url)
-    if r.status_code == 200:
-        return r.content
-    return None
+    status, body = await client.get(url, target=target)
+    if status == 304:
+        return NOT_MODIFIED
+    return body if status == 200 else None
+
+
+async def fetch_files_via_graphql(client: AsyncHttpClient,
+                                  triples: Iterable[Tuple[str, str, str, str]]) -> Dict[Tuple[str, str, str, str], bytes]:
+    """
+    Fetch many (owner, repo, sha, path) blobs with one GraphQL query, one aliased repository/object node each.
+    Returns {(owner, repo, sha, path): bytes} for the blobs that came back complete as text; missing, binary,
+    truncated or not-UTF-8 blobs are left out so the caller can fall back to the raw host / Contents API.
+    GraphQL requires a token.
+    """
+    triples = list(triples)
+    if not triples:
+        return {}
+    # json.dumps gives valid GraphQL string literals (quotes and backslashes escaped)
+    nodes = [
+        f"f{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(repo)}) "
+        f"{{ object(expression: {json.dumps(f'{sha}:{path}')}) {{ ... on Blob {{ text isBinary isTruncated byteSize }} }} }}"
+        for i, (owner, repo, sha, path) in enumerate(triples)
+    ]
+    status, body = await client.post(f"{GITHUB_API}/graphql", {"query": "query { " + " ".join(nodes) + " }"})
+    if status != 200:
+        return {}
+    # Unknown repositories come back as null nodes plus an "errors" entry; the other nodes are still usable
+    data = json_loads(body).get("data") or {}
+
+    found = {}
+    for i, key in enumerate(triples):
+        blob = (data.get(f"f{i}") or {}).get("object") or {}
+        text = blob.get("text")
+        if text is None or blob.get("isBinary") or blob.get("isTruncated"):
+            continue
+        content = text.encode("utf-8")
+        # A size mismatch means the blob was not valid UTF-8 and the text is lossy
+        if blob.get("byteSize") is not None and len(content) != blob["byteSize"]:
+            continue
+        found[key] = content
+    return found
+
+
+_UNSAFE_SEGMENT_RE = re.compile(r"[^A-Za-z0-9._-]+")
 
 
 def safe_path_segment(s: str) -> str:
-    return re.sub(r"[^A-Za-z0-9._-]+", "_", s)
+    # Each run of disallowed characters (including any non-ASCII) becomes a single "_"
+    return _UNSAFE_SEGMENT_RE.sub("_", s)
 
 
+@lru_cache(maxsize=65536)  # the same filenames recur across commits and PRs
 def should_skip_file(path: str, include_binary: bool) -> bool:
     if include_binary:
         return False
     return not is_textlike(path)
 
 
-def save_one(owner: str, repo: str, number: int, sha: str, filepath: str, out_dir: Path, client: HttpClient,
-             overwrite: bool, include_binary: bool) -> bool:
-    target = out_dir / f"{owner}__{repo}" / f"pr_{number}" / f"sha_{sha}" / filepath
-    if target.exists() and not overwrite:
-        return True
-    if should_skip_file(filepath, include_binary):
-        return False
-
-    # Try raw first (works for large files)
-    content = fetch_file_via_raw(owner, repo, filepath, sha, client)
+async def _save_row(owner: str, repo: str, sha: str, filepath: str, targets: List[Path],
+                    client: AsyncHttpClient, index: BlobIndex, content: Optional[bytes]) -> bool:
+    # Fetch and save a file; `content` is the GraphQL result, if any.
+    # The file is saved to targets[0] and hard-linked to the other PRs' paths.
+    # Blocking file writes run in the default thread pool so they don't stall the event loop.
+    loop = asyncio.get_running_loop()
+    if content is None:
+        # Try raw first (works for large files)
+        content = await fetch_file_via_raw_async(owner, repo, filepath, sha, client, target=targets[0])
     if content is None:
         # Fallback to API
-        content = fetch_file_via_api(client, owner, repo, filepath, ref=sha)
+        content = await fetch_file_via_api_async(client, owner, repo, filepath, ref=sha)
     if content is None:
         return False
 
-    target.parent.mkdir(parents=True, exist_ok=True)
-    with open(target, "wb") as f:
-        f.write(content)
+    if content is not NOT_MODIFIED:
+        await loop.run_in_executor(None, save_bytes, targets[0], content)
+        index.add(sha, filepath, targets[0], content)
+    if len(targets) > 1:
+        await loop.run_in_executor(None, link_copies, targets[0], targets[1:])
     return True
 
 
+async def _fetch_batch(batch: list, out_dir: Path, client: AsyncHttpClient, index: BlobIndex,
+                       overwrite: bool, include_binary: bool) -> list:
+    """
+    Save a batch of (owner, repo, numbers, sha, filename) rows, one per distinct file, where `numbers` are the
+    PRs whose merged rows reference it. Returns how many merged rows were saved per batch row.
+    Each file is fetched at most once: an existing copy (without overwrite; also one recorded in the
+    BlobIndex) or the downloaded one is hard-linked into the other PRs' directories.
+    With a token the files still missing are first requested with a single GraphQL query,
+    then the rest go through raw/API concurrently.
+    """
+    saved = [0] * len(batch)
+    missing = []
+    link = []
+    for i, (owner, repo, numbers, sha, filepath) in enumerate(batch):
+        paths = {n: out_dir / f"{owner}__{repo}" / f"pr_{n}" / f"sha_{sha}" / filepath for n in numbers}
+        targets = list(paths.values())
+        existing = [] if overwrite else [t for t in targets if t.exists()]
+        if should_skip_file(filepath, include_binary) or len(existing) == len(targets):
+            saved[i] = sum(paths[n] in existing for n in numbers)
+        elif existing:
+            link.append((i, len(numbers), existing[0], targets))
+        else:
+            missing.append((i, len(numbers), owner, repo, sha, filepath, targets))
+
+    loop = asyncio.get_running_loop()
+    # Copies recorded in the BlobIndex are re-hashed in the thread pool, not on the event loop
+    sources = await asyncio.gather(*(
+        loop.run_in_executor(None, index.lookup, sha, fp) if not overwrite and index.has(sha, fp) else asyncio.sleep(0)
+        for _, _, _, _, sha, fp, _ in missing
+    ))
+    todo = []
+    for row, source in zip(missing, sources):
+        if source:
+            link.append((row[0], row[1], source, row[6]))
+        else:
+            todo.append(row)
+    for i, n, source, targets in link:
+        await loop.run_in_executor(None, link_copies, source, targets)
+        saved[i] = n
+
+    blobs = {}
+    # Files with a recorded ETag go through a conditional raw request instead of GraphQL
+    batched = [(owner, repo, sha, fp) for _, _, owner, repo, sha, fp, targets in todo
+               if not (client.etags and targets[0].exists() and f"{RAW_HOST}/{owner}/{repo}/{sha}/{fp}" in client.etags)]
+    if client.token and batched:
+        blobs = await fetch_files_via_graphql(client, batched)
+    ok = await asyncio.gather(*(
+        _save_row(owner, repo, sha, fp, targets, client, index, blobs.get((owner, repo, sha, fp)))
+        for _, _, owner, repo, sha, fp, targets in todo
+    ))
+    for (i, n, *_), s in zip(todo, ok):
+        saved[i] = n if s else 0
+    return saved
+
+
+async def _download_rows(rows: Iterable[Tuple[str, str, Tuple[int, ...], str, str]], total: int, out_dir: Path,
+                         token: Union[str, List[str], None], overwrite: bool, include_binary: bool) -> int:
+    """
+    Fetch every (owner, repo, numbers, sha, filename) row over one keep-alive aiohttp session.
+    Workers pull GRAPHQL_BATCH rows at a time from a shared iterator, so only a bounded number of
+    fetches exist at any time (instead of one pending task per row).
+    """
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENCY, limit_per_host=MAX_PER_HOST)
+    # No total timeout: it would also count the wait for a free connection and the whole body download
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+    rows = iter(rows)
+    done = success = 0
+
+    etags = EtagCache(out_dir / ETAG_CACHE_FILE)
+    index = BlobIndex(out_dir / BLOB_INDEX_FILE)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        client = AsyncHttpClient(session=session, token=token, etags=etags)
+
+        async def worker():
+            nonlocal done, success
+            while batch := list(islice(rows, GRAPHQL_BATCH)):
+                saved = await _fetch_batch(batch, out_dir, client, index,
+                                           overwrite=overwrite, include_binary=include_binary)
+                n = sum(len(numbers) for _, _, numbers, _, _ in batch)
+                if (done + n) // 200 > done // 200:
+                    print(f"[JOIN] Progress {done + n}/{total}, saved={success + sum(saved)}")
+                done += n
+                success += sum(saved)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(MAX_CONCURRENCY)))
+        finally:
+            etags.save()
+            index.save()
+    return success
+
+
 def download_pr_code_join(
     prs_csv: Union[Path, str, pd.DataFrame],
     details_csv: Union[Path, str, pd.DataFrame],
     out_dir: Union[Path, str],
-    token: Optional[str] = None,
+    token: Union[str, List[str], None] = None,
     overwrite: bool = False,
     include_binary: bool = False,
     limit: Optional[int] = None,
+    chunksize: Optional[int] = None,
 ) -> dict:
     """
     Download source files for commits associated with PRs using JOIN mode.
@@ -169,10 +583,13 @@ def download_pr_code_join(
     - prs_csv: path or DataFrame for human_pull_request.csv (must have columns: id, number, repo_url)
     - details_csv: path or DataFrame for pr_commit_details.csv (must have columns: pr_id, sha, filename)
     - out_dir: output directory path
-    - token: GitHub token for authentication (optional)
+    - token: GitHub token for authentication, or a list of tokens to rotate over (optional)
     - overwrite: whether to overwrite existing files
     - include_binary: whether to include binary/unknown filetypes
     - limit: limit number of merged rows to process (optional)
+    - chunksize: read a details CSV path in chunks of this many rows (e.g. 200_000), joining and fetching each
+      chunk before reading the next, to bound memory (optional). Files are deduplicated within a chunk,
+      and `limit` counts joined rows chunk by chunk.
 
     Returns:
     A dict summary with keys:
@@ -180,7 +597,7 @@ def download_pr_code_join(
       - "rows_processed": int number of rows processed
       - "out_dir": str output directory path
     """
-    def _ensure_df(obj: Union[Path, str, pd.DataFrame], usecols: list[str]) -> pd.DataFrame:
+    def _ensure_df(obj: Union[Path, str, pd.DataFrame], usecols: list[str], chunksize: Optional[int] = None):
         if isinstance(obj, pd.DataFrame):
             # Select only needed columns if present
             missing = [c for c in usecols if c not in obj.columns]
@@ -188,43 +605,44 @@ def download_pr_code_join(
                 raise ValueError(f"DataFrame missing required columns: {missing}")
             return obj.loc[:, usecols]
         else:
-            return pd.read_csv(obj, usecols=usecols)
-
-    prs = _ensure_df(prs_csv, ["id", "number", "repo_url"])
-    det = _ensure_df(details_csv, ["pr_id", "sha", "filename"])
-    merged = prs.merge(det, left_on="id", right_on="pr_id", how="inner")
-
-    if limit:
-        merged = merged.head(limit)
-
-    # Parse owner/repo from repo_url (api or html)
-    def parse(row):
-        owner, repo = parse_owner_repo(row["repo_url"])
-        return pd.Series({"owner": owner, "repo": repo})
-
-    parsed = merged.apply(parse, axis=1)
-    merged = pd.concat([merged, parsed], axis=1)
-
-    client = HttpClient(token=token)
-
-    success = 0
-    total = len(merged)
-    for i, row in merged.iterrows():
-        ok = save_one(
-            owner=row["owner"],
-            repo=row["repo"],
-            number=int(row["number"]),
-            sha=row["sha"],
-            filepath=row["filename"],
-            out_dir=Path(out_dir),
-            client=client,
-            overwrite=overwrite,
-            include_binary=include_binary,
-        )
-        if ok:
-            success += 1
-        if i % 200 == 0 and i > 0:
-            print(f"[JOIN] Progress {i}/{total}, saved={success}")
+            return pd.read_csv(obj, usecols=usecols, dtype={c: JOIN_DTYPES[c] for c in usecols}, chunksize=chunksize)
+
+    prs = _ensure_df(prs_csv, ["id", "number", "repo_url"]).set_index("id")
+    if chunksize and not isinstance(details_csv, pd.DataFrame):
+        dets = _ensure_df(details_csv, ["pr_id", "sha", "filename"], chunksize=chunksize)
+    else:
+        dets = [_ensure_df(details_csv, ["pr_id", "sha", "filename"])]
+
+    success = total = 0
+    for det in dets:
+        # One PR, many commit files: a repeated PR id would multiply its rows, so it raises a MergeError instead
+        merged = prs.join(det.set_index("pr_id"), how="inner", validate="one_to_many").reset_index()
+
+        if limit:
+            merged = merged.head(limit - total)
+
+        # Parse owner/repo from repo_url (api or html), same pattern as parse_owner_repo in one vectorized pass
+        merged[["owner", "repo"]] = merged["repo_url"].str.extract(_OWNER_REPO_RE.pattern, expand=True)
+        bad = merged["owner"].isna()
+        if bad.any():
+            raise ValueError(f"Unrecognized repo_url format: {merged.loc[bad, 'repo_url'].iloc[0]}")
+
+        rows_read = len(merged)
+        if not include_binary:
+            # Non-text files are dropped here in one pass rather than skipped row by row
+            merged = merged[textlike_mask(merged["filename"])]
+
+        # Fetch concurrently (see _download_rows)
+        # PRs sharing a commit reference the same files: one row per distinct (owner, repo, sha, filename),
+        # carrying the numbers of every PR that needs it (see _fetch_batch)
+        files = merged.groupby(["owner", "repo", "sha", "filename"], sort=False, dropna=False)["number"].agg(tuple)
+        # Plain column arrays zipped together: no per-row Series as with iterrows
+        rows = ((owner, repo, tuple(map(int, numbers)), sha, filename)
+                for (owner, repo, sha, filename), numbers in zip(files.index, files.to_numpy()))
+        success += asyncio.run(_download_rows(rows, len(merged), Path(out_dir), token, overwrite, include_binary))
+        total += rows_read
+        if limit and total >= limit:
+            break
     print(f"[JOIN] Done. Saved {success} files from {total} rows.")
 
     return {
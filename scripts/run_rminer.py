@@ -22,8 +22,11 @@ Usage examples:
 import argparse
 import csv
 import os
+import re
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
@@ -58,46 +61,44 @@ def first_col(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
             return lower[c]
     return None
 
-def normalize_repo_url(row, repo_col: str) -> Optional[str]:
-    val = str(row[repo_col]).strip()
-    if not val or val.lower() == "nan":
-        return None
+def normalize_repo_urls(values: pd.Series) -> pd.Series:
+    """
+    Column-wise repo URL normalization -> https://github.com/owner/repo.git per value, <NA> if missing/invalid.
+    Each case is a masked string op over the whole column; values settled by an earlier case are left alone.
+    """
+    val = values.astype("string").str.strip()
+    val = val.mask((val == "") | (val.str.lower() == "nan"))
+    out = pd.Series(pd.NA, index=val.index, dtype="string")
+    todo = val.notna()
+
+    def take(mask: pd.Series, owner: pd.Series, repo: pd.Series) -> None:
+        nonlocal todo
+        mask = (mask & todo).fillna(False).astype(bool)
+        out[mask] = "https://github.com/" + owner[mask] + "/" + repo[mask] + ".git"
+        todo &= ~mask
+
     # Case 1: owner/repo shorthand -> https://github.com/owner/repo.git
-    if "/" in val and not val.startswith("http"):
-        owner, repo = val.split("/", 1)
-        owner, repo = owner.strip(), repo.strip()
-        if owner and repo:
-            return f"https://github.com/{owner}/{repo}.git"
-        return None
-    # Case 2: URL inputs
-    if val.startswith("http"):
-        v = val.rstrip("/")
-        # API-style endpoints -> map to github.com/owner/repo.git
-        for marker in ("api.github.com/repos/", "apihub.com/repos/"):
-            if marker in v:
-                tail = v.split(marker, 1)[1].strip("/")
-                parts = tail.split("/")
-                if len(parts) >= 2:
-                    owner, repo = parts[0], parts[1]
-                    return f"https://github.com/{owner}/{repo}.git"
-        # Direct github.com link -> normalize to https://github.com/owner/repo.git
-        if "github.com" in v:
-            parts = v.split("github.com/", 1)
-            if len(parts) == 2:
-                tail = parts[1]
-                tail = tail.split("?", 1)[0].split("#", 1)[0]
-                tail = tail.strip("/")
-                if "/" in tail:
-                    owner, repo = tail.split("/", 1)
-                    repo = repo.replace(".git", "")
-                    return f"https://github.com/{owner}/{repo}.git"
-            # Fallback: if it's already a repo root, ensure .git
-            if v.endswith(".git"):
-                return v
-            return v + ".git"
-        # Unknown host -> reject
-        return None
-    return None
+    is_http = val.str.startswith("http").fillna(False).astype(bool)
+    short = val.str.extract(r"(?s)^([^/]*)/(.*)$")
+    owner, repo = short[0].str.strip(), short[1].str.strip()
+    take(~is_http & (owner != "") & (repo != ""), owner, repo)
+    # Case 2: URL inputs (anything else left over is invalid)
+    todo &= is_http
+    v = val.str.rstrip("/")
+    # API-style endpoints -> map to github.com/owner/repo.git
+    for marker in (r"api\.github\.com/repos/", r"apihub\.com/repos/"):
+        tail = v.str.extract(r"(?s)^.*?" + marker + r"(.*)$")[0].str.strip("/")
+        parts = tail.str.extract(r"(?s)^([^/]*)/([^/]*)")
+        take(parts[0].notna(), parts[0], parts[1])
+    # Direct github.com link -> normalize to https://github.com/owner/repo.git
+    tail = v.str.extract(r"(?s)^.*?github\.com/([^?#]*)")[0].str.strip("/")
+    parts = tail.str.extract(r"(?s)^([^/]*)/(.*)$")
+    take(parts[0].notna(), parts[0], parts[1].str.replace(".git", "", regex=False))
+    # Fallback: if it's already a repo root, ensure .git
+    root = (todo & v.str.contains("github.com", regex=False)).fillna(False).astype(bool)
+    out[root] = v[root].where(v[root].str.endswith(".git"), v[root] + ".git")
+    # Unknown host -> reject
+    return out
 
 def find_repo_and_number(df: pd.DataFrame) -> Tuple[str, str]:
     repo_col = first_col(df, REPO_CANDIDATES)
@@ -132,33 +133,27 @@ def load_and_filter(csv_path: str, requested_ids: List[str]) -> Tuple[List[PRIte
     id_col = find_id_col(df)
     repo_col, prnum_col = find_repo_and_number(df)
 
-    # Normalize id col to str for matching
-    df["_id_match"] = df[id_col].astype(str).str.strip()
-    requested_ids = [str(x).strip() for x in requested_ids if str(x).strip()]
-    filt = df[df["_id_match"].isin(requested_ids)].copy()
+    # Normalize id col to str for matching (a local Series, not a new column on the full frame)
+    id_match = df[id_col].astype("string").str.strip()
+    requested = {str(x).strip() for x in requested_ids} - {""}
+    hit = id_match.isin(requested).fillna(False).astype(bool)
 
-    if filt.empty:
+    if not hit.any():
         raise SystemExit(f"No rows matched the provided IDs in {csv_path}. "
                          f"Ensure the PR IDs correspond to column '{id_col}'.")
 
-    # Normalize repo URLs
-    filt["_repo_url_norm"] = filt.apply(lambda r: normalize_repo_url(r, repo_col), axis=1)
-    missing_repo = filt["_repo_url_norm"].isna().sum()
+    # Normalize repo URLs and PR numbers of the matched rows; one mask keeps the usable ones
+    repo_url = normalize_repo_urls(df.loc[hit, repo_col])
+    missing_repo = repo_url.isna().sum()
     if missing_repo > 0:
         print(f"[WARN] {missing_repo} row(s) missing/invalid repo URL; they will be skipped.", file=sys.stderr)
-        filt = filt[~filt["_repo_url_norm"].isna()].copy()
-
-    # Normalize PR number
-    filt["_pr_number_str"] = filt[prnum_col].astype(str).str.strip()
-    filt = filt[filt["_pr_number_str"].str.isdigit()].copy()
+    pr_number = df.loc[hit, prnum_col].astype(str).str.strip()
+    keep = repo_url.notna() & pr_number.str.isdigit()
 
-    items: List[PRItem] = []
-    for _, row in filt.iterrows():
-        items.append(PRItem(
-            id_val=str(row["_id_match"]),
-            repo_url=str(row["_repo_url_norm"]),
-            pr_number=str(row["_pr_number_str"]),
-        ))
+    items = [
+        PRItem(id_val=str(id_val), repo_url=str(url), pr_number=str(num))
+        for id_val, url, num in zip(id_match[hit][keep], repo_url[keep], pr_number[keep])
+    ]
     return items, id_col, repo_col, prnum_col
 
 def write_commands(items: List[PRItem], out_tsv: str) -> None:
@@ -172,7 +167,28 @@ def write_commands(items: List[PRItem], out_tsv: str) -> None:
             cmd = f'RefactoringMiner -gp "{it.repo_url}" {it.pr_number} 120'
             w.writerow([it.id_val, it.repo_url, it.pr_number, cmd])
 
-def maybe_run_refactoringminer(items: List[PRItem], rminer: str, results_dir: str) -> None:
+def _run_one(it: PRItem, rminer: str, results_dir: str, token_path: str) -> None:
+    print(f"[RUN] {it.id_val}  {it.repo_url}  #{it.pr_number}")
+    # Each PR to its own subdir
+    out_dir = os.path.join(results_dir, f"{it.id_val}_{it.pr_number}")
+    os.makedirs(out_dir, exist_ok=True)
+    # Typical usage: RefactoringMiner -gp <repo_url> <pr_number> 120 -json <file>
+    json_path = os.path.join(out_dir, "refactorings.json")
+    json_path_abs = os.path.abspath(json_path)
+    # A path is made absolute since the run happens in a temp dir; a bare command name is left to PATH
+    exe = os.path.abspath(rminer) if os.sep in rminer else rminer
+    cmd = [
+        exe, "-gp", it.repo_url, it.pr_number, "120", "-json", json_path_abs
+    ]
+    # Own working dir per run (RefactoringMiner reads github-oauth.properties from it), so parallel runs don't share one
+    with tempfile.TemporaryDirectory(prefix="rminer_") as work_dir:
+        try:
+            os.symlink(token_path, os.path.join(work_dir, "github-oauth.properties"))
+        except OSError:
+            shutil.copyfile(token_path, os.path.join(work_dir, "github-oauth.properties"))
+        subprocess.run(cmd, check=True, cwd=work_dir)
+
+def maybe_run_refactoringminer(items: List[PRItem], rminer: str, results_dir: str, workers: Optional[int] = None) -> None:
     os.makedirs(results_dir, exist_ok=True)
     rminer_dir = os.path.dirname(os.path.abspath(rminer)) or "."
     token_path = os.path.join(rminer_dir, "github-oauth.properties")
@@ -182,21 +198,16 @@ def maybe_run_refactoringminer(items: List[PRItem], rminer: str, results_dir: st
         return
     else:
         print(f"[INFO] Found token at: {token_path}")
-    for it in items:
-        print(f"[RUN] {it.id_val}  {it.repo_url}  #{it.pr_number}")
-        # Each PR to its own subdir
-        out_dir = os.path.join(results_dir, f"{it.id_val}_{it.pr_number}")
-        os.makedirs(out_dir, exist_ok=True)
-        # Typical usage: RefactoringMiner -gp <repo_url> <pr_number> 120 -json <file>
-        json_path = os.path.join(out_dir, "refactorings.json")
-        json_path_abs = os.path.abspath(json_path)
-        cmd = [
-            rminer, "-gp", it.repo_url, it.pr_number, "120", "-json", json_path_abs
-        ]
-        try:
-            subprocess.run(cmd, check=True, cwd=rminer_dir)
-        except subprocess.CalledProcessError as e:
-            print(f"[ERROR] Failed on {it.id_val} #{it.pr_number}: {e}", file=sys.stderr)
+    # Each run is an out-of-process JVM, so threads are enough to keep several going at once
+    workers = workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_one, it, rminer, results_dir, token_path): it for it in items}
+        for fut in as_completed(futures):
+            it = futures[fut]
+            try:
+                fut.result()
+            except (subprocess.CalledProcessError, OSError) as e:
+                print(f"[ERROR] Failed on {it.id_val} #{it.pr_number}: {e}", file=sys.stderr)
 
 def parse_ids(ids: Optional[str], ids_file: Optional[str]) -> List[str]:
     collected: List[str] = []
@@ -204,20 +215,10 @@ def parse_ids(ids: Optional[str], ids_file: Optional[str]) -> List[str]:
         collected += [x.strip() for x in ids.split(",") if x.strip()]
     if ids_file:
         with open(ids_file, "r") as f:
-            for line in f:
-                line = line.strip().split("#", 1)[0]  # allow comments
-                if not line:
-                    continue
-                parts = [x.strip() for x in line.replace(" ", ",").split(",")]
-                collected += [p for p in parts if p]
+            data = re.sub(r"#[^\n]*", "", f.read())  # allow comments
+        collected += [p for p in re.split(r"[\s,]+", data) if p]
     # Deduplicate, keep order
-    seen = set()
-    uniq = []
-    for x in collected:
-        if x not in seen:
-            uniq.append(x)
-            seen.add(x)
-    return uniq
+    return list(dict.fromkeys(collected))
 
 def main():
     ap = argparse.ArgumentParser(description="Filter PRs and (optionally) run RefactoringMiner.")
@@ -233,6 +234,8 @@ def main():
                     help="Path to RefactoringMiner executable; if provided, will run it")
     ap.add_argument("--results-dir", default="rminer_results",
                     help="Where to store RefactoringMiner outputs (when --rminer is provided)")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="RefactoringMiner runs in parallel (default: min(8, CPU count))")
     args = ap.parse_args()
 
     ids = parse_ids(args.ids, args.ids_file)
@@ -251,7 +254,7 @@ def main():
 
     if args.rminer:
         print(f"[INFO] Running RefactoringMiner for {len(items)} PRs...")
-        maybe_run_refactoringminer(items, args.rminer, args.results_dir)
+        maybe_run_refactoringminer(items, args.rminer, args.results_dir, args.workers)
         print(f"[DONE] Results at {args.results_dir}")
 
 if __name__ == "__main__":